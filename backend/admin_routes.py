@@ -13,48 +13,79 @@ from functools import wraps
 from models import (
     db,
     Link,
-    SiteIcon,
     WorkCard,
     CalculatorSettings,
-    IntroButtonLink,
-    ContactUsButtonLink,
-    IntroBackground,
-    ChatBotSettings,
-    UmamiSettings,
+    Job,
     SupportRequest,
     PageContent,
     PromotionsPage,
 )
-from werkzeug.utils import secure_filename
+from cities import all_cities, city_to_dict, find_city, replace_cities, upsert_city, validate_city
+from content_cache import invalidates_content
+from database import immediate_writes
+from jobs import enqueue_upload_jobs, job_to_dict
+from products import (
+    PROMOTIONS_PAGE,
+    add_product,
+    delete_product,
+    list_products,
+    product_at,
+    replace_products,
+    update_product,
+)
+from site_settings import DEFAULT_UMAMI_WEBSITE_ID, save_settings, site_settings
+from uploads import (
+    ICON_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    UploadError,
+    store_upload,
+)
 import os
 import logging
 import requests
-from datetime import datetime
 
 UMAMI_API_BASE = "https://api.umami.is/v1"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.dirname(BASE_DIR)
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-UPLOADS_DIR = os.path.join(DATA_DIR, "uploads")
-
-os.makedirs(UPLOADS_DIR, exist_ok=True)
 
 admin_bp = Blueprint("admin", __name__)
 
 security_logger = logging.getLogger("security")
 
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+MAX_IMAGE_UPLOAD_SIZE = 15 * 1024 * 1024
 
 
-def _get_upload_dir(*path_parts):
-    upload_dir = os.path.join(UPLOADS_DIR, *path_parts)
-    os.makedirs(upload_dir, exist_ok=True)
-    return upload_dir
-
-
-def _build_upload_url(*path_parts):
-    cleaned_parts = [part.strip("/\\") for part in path_parts if part]
-    return "/" + "/".join(["uploads", *cleaned_parts])
+def _handle_upload(allowed_extensions, log_label, error_message, build_response, max_size=None, jobs=()):
+    """
+    Общий обработчик загрузок: файл сохраняется через uploads.store_upload
+    (по хэшу содержимого, без дублей), build_response(record) делает
+    специфичную для эндпоинта часть и возвращает тело ответа.
+    Обработка (копии для srcset и задачи из jobs) ставится в фоновую
+    очередь; их id возвращаются в "jobs" для /admin/api/jobs/<id>.
+    Сама загрузка публичный контент не меняет (версию поднимает
+    сохранение карточки или ссылки), поэтому эндпоинты, которые только
+    загружают файл, идут без @invalidates_content.
+    """
+    try:
+        record, created = store_upload(
+            request.files.get("file"),
+            allowed_extensions,
+            max_size=max_size,
+        )
+        payload = build_response(record)
+        queued = enqueue_upload_jobs(record, jobs)
+        security_logger.info(
+            f"{log_label} uploaded by IP: {request.remote_addr}, file: {record.relative_path}"
+            f"{'' if created else ' (duplicate)'}"
+        )
+        return jsonify({"success": True, **payload, "jobs": [job.id for job in queued]})
+    except UploadError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        security_logger.error(f"Error uploading {log_label.lower()}: {str(e)}")
+        return jsonify({"success": False, "message": error_message}), 500
 
 
 def is_logged_in():
@@ -79,53 +110,14 @@ def admin_static(filename):
 
 @admin_bp.route("/admin/api/upload-icon", methods=["POST"])
 @require_login
+@immediate_writes
 def upload_icon():
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        allowed_extensions = {"png", "jpg", "jpeg", "gif", "svg", "webp", "ico"}
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-
-        if file_ext not in allowed_extensions:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Недопустимое расширение файла. Разрешены: {', '.join(allowed_extensions)}",
-                    }
-                ),
-                400,
-            )
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = secure_filename(filename)
-        name_without_ext = safe_filename.rsplit(".", 1)[0] if "." in safe_filename else safe_filename
-        unique_filename = f"{name_without_ext}_{timestamp}.{file_ext}"
-
-        upload_dir = _get_upload_dir("icons")
-
-        file_path = os.path.join(upload_dir, unique_filename)
-        file.save(file_path)
-
-        icon_path = _build_upload_url("icons", unique_filename)
-
-        security_logger.info(f"Icon uploaded by IP: {request.remote_addr}, file: {unique_filename}")
-        return jsonify(
-            {
-                "success": True,
-                "message": "Иконка успешно загружена",
-                "icon_path": icon_path,
-            }
-        )
-    except Exception as e:
-        security_logger.error(f"Error uploading icon: {str(e)}")
-        return jsonify({"success": False, "message": "Ошибка при загрузке иконки"}), 500
+    return _handle_upload(
+        ICON_EXTENSIONS,
+        "Icon",
+        "Ошибка при загрузке иконки",
+        lambda record: {"message": "Иконка успешно загружена", "icon_path": record.url},
+    )
 
 
 @admin_bp.route("/admin")
@@ -177,17 +169,17 @@ def admin_logout():
 @admin_bp.route("/admin/api/site-icon", methods=["GET"])
 @require_login
 def get_site_icon():
-    site_icon = SiteIcon.query.first()
     return jsonify(
         {
             "success": True,
-            "icon_path": site_icon.icon_path if site_icon else None,
+            "icon_path": site_settings()["site_icon_path"],
         }
     )
 
 
 @admin_bp.route("/admin/api/site-icon", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_site_icon():
     try:
         data = request.json
@@ -196,13 +188,7 @@ def update_site_icon():
         if not icon_path:
             return jsonify({"success": False, "message": "Путь к иконке обязателен"}), 400
 
-        site_icon = SiteIcon.query.first()
-        if site_icon:
-            site_icon.icon_path = icon_path
-        else:
-            site_icon = SiteIcon(icon_path=icon_path)
-            db.session.add(site_icon)
-
+        save_settings(site_icon_path=icon_path)
         db.session.commit()
 
         security_logger.info(f"Site icon updated by IP: {request.remote_addr}")
@@ -210,7 +196,7 @@ def update_site_icon():
             {
                 "success": True,
                 "message": "Иконка сайта успешно обновлена",
-                "icon_path": site_icon.icon_path,
+                "icon_path": icon_path,
             }
         )
     except Exception as e:
@@ -229,74 +215,33 @@ def update_site_icon():
 
 @admin_bp.route("/admin/api/upload-site-icon", methods=["POST"])
 @require_login
+@invalidates_content
 def upload_site_icon():
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        allowed_extensions = {"png", "jpg", "jpeg", "gif", "svg", "webp", "ico"}
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-
-        if file_ext not in allowed_extensions:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Недопустимое расширение файла. Разрешены: {', '.join(allowed_extensions)}",
-                    }
-                ),
-                400,
-            )
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = secure_filename(filename)
-        name_without_ext = safe_filename.rsplit(".", 1)[0] if "." in safe_filename else safe_filename
-        unique_filename = f"site-icon_{name_without_ext}_{timestamp}.{file_ext}"
-
-        upload_dir = _get_upload_dir("site")
-
-        file_path = os.path.join(upload_dir, unique_filename)
-        file.save(file_path)
-
-        icon_path = _build_upload_url("site", unique_filename)
-
-        site_icon = SiteIcon.query.first()
-        if site_icon:
-            site_icon.icon_path = icon_path
-        else:
-            site_icon = SiteIcon(icon_path=icon_path)
-            db.session.add(site_icon)
+    def build_response(record):
+        save_settings(site_icon_path=record.url)
         db.session.commit()
-
-        security_logger.info(f"Site icon uploaded by IP: {request.remote_addr}, file: {unique_filename}")
-        return jsonify(
-            {
-                "success": True,
-                "message": "Иконка сайта успешно загружена",
-                "icon_path": icon_path,
-            }
-        )
-    except Exception as e:
-        db.session.rollback()
-        security_logger.error(f"Error uploading site icon: {str(e)}")
-        return jsonify({"success": False, "message": "Ошибка при загрузке иконки сайта"}), 500
+        return {"message": "Иконка сайта успешно загружена", "icon_path": record.url}
+
+    return _handle_upload(
+        ICON_EXTENSIONS,
+        "Site icon",
+        "Ошибка при загрузке иконки сайта",
+        build_response,
+        jobs=("site_icon_variants",),
+    )
 
 @admin_bp.route("/admin/api/intro-button-link", methods=["GET"])
 @require_login
 def get_intro_button_link():
-    intro_link = IntroButtonLink.query.first()
-    if intro_link:
-        return jsonify({"success": True, "link": intro_link.link})
+    link = site_settings()["intro_button_link"]
+    if link:
+        return jsonify({"success": True, "link": link})
     return jsonify({"success": False, "message": "Ссылка кнопки 'Подробнее' не найдена"}), 404
 
 
 @admin_bp.route("/admin/api/intro-button-link", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_intro_button_link():
     try:
         data = request.json
@@ -308,16 +253,10 @@ def update_intro_button_link():
         if not (link.startswith("#") or link.startswith("http://") or link.startswith("https://") or link.startswith("/")):
             return jsonify({"success": False, "message": "Ссылка должна начинаться с #, http://, https:// или /"}), 400
 
-        intro_link = IntroButtonLink.query.first()
-        if intro_link:
-            intro_link.link = link
-        else:
-            intro_link = IntroButtonLink(link=link)
-            db.session.add(intro_link)
-        
+        save_settings(intro_button_link=link)
         db.session.commit()
         security_logger.info(f"Intro button link updated by IP: {request.remote_addr}")
-        return jsonify({"success": True, "message": "Ссылка кнопки 'Подробнее' успешно обновлена", "link": intro_link.link})
+        return jsonify({"success": True, "message": "Ссылка кнопки 'Подробнее' успешно обновлена", "link": link})
     except Exception as e:
         db.session.rollback()
         security_logger.error(f"Error updating intro button link: {str(e)}")
@@ -326,14 +265,15 @@ def update_intro_button_link():
 @admin_bp.route("/admin/api/contact-us-button-link", methods=["GET"])
 @require_login
 def get_contact_us_button_link():
-    contact_link = ContactUsButtonLink.query.first()
-    if contact_link:
-        return jsonify({"success": True, "link": contact_link.link})
+    link = site_settings()["contact_us_button_link"]
+    if link:
+        return jsonify({"success": True, "link": link})
     return jsonify({"success": False, "message": "Ссылка кнопки 'Вступить в команду' не найдена"}), 404
 
 
 @admin_bp.route("/admin/api/contact-us-button-link", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_contact_us_button_link():
     try:
         data = request.json
@@ -345,16 +285,10 @@ def update_contact_us_button_link():
         if not (link.startswith("#") or link.startswith("http://") or link.startswith("https://") or link.startswith("/")):
             return jsonify({"success": False, "message": "Ссылка должна начинаться с #, http://, https:// или /"}), 400
 
-        contact_link = ContactUsButtonLink.query.first()
-        if contact_link:
-            contact_link.link = link
-        else:
-            contact_link = ContactUsButtonLink(link=link)
-            db.session.add(contact_link)
-        
+        save_settings(contact_us_button_link=link)
         db.session.commit()
         security_logger.info(f"Contact us button link updated by IP: {request.remote_addr}")
-        return jsonify({"success": True, "message": "Ссылка кнопки 'Вступить в команду' успешно обновлена", "link": contact_link.link})
+        return jsonify({"success": True, "message": "Ссылка кнопки 'Вступить в команду' успешно обновлена", "link": link})
     except Exception as e:
         db.session.rollback()
         security_logger.error(f"Error updating contact us button link: {str(e)}")
@@ -363,80 +297,40 @@ def update_contact_us_button_link():
 @admin_bp.route("/admin/api/intro-background", methods=["GET"])
 @require_login
 def get_intro_background():
-    intro_bg = IntroBackground.query.first()
-    if intro_bg:
+    settings = site_settings()
+    if settings["intro_background_path"]:
         return jsonify({
             "success": True,
-            "background_path": intro_bg.background_path,
-            "background_type": intro_bg.background_type
+            "background_path": settings["intro_background_path"],
+            "background_type": settings["intro_background_type"]
         })
     return jsonify({"success": False, "message": "Фон первой секции не найден"}), 404
 
 
 @admin_bp.route("/admin/api/upload-intro-background", methods=["POST"])
 @require_login
+@invalidates_content
 def upload_intro_background():
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-        
-        allowed_image_extensions = {"png", "jpg", "jpeg", "gif", "svg", "webp"}
-        allowed_video_extensions = {"mp4", "webm", "ogg", "mov"}
-        
-        if file_ext not in allowed_image_extensions and file_ext not in allowed_video_extensions:
-            return jsonify({
-                "success": False,
-                "message": f"Недопустимое расширение файла. Разрешены изображения: {', '.join(allowed_image_extensions)}, видео: {', '.join(allowed_video_extensions)}"
-            }), 400
-
-        background_type = "video" if file_ext in allowed_video_extensions else "image"
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = secure_filename(filename)
-        name_without_ext = safe_filename.rsplit(".", 1)[0] if "." in safe_filename else safe_filename
-        unique_filename = f"intro-bg_{name_without_ext}_{timestamp}.{file_ext}"
+    def build_response(record):
+        background_type = "video" if record.ext in VIDEO_EXTENSIONS else "image"
 
-        if background_type == "video":
-            upload_dir = _get_upload_dir("video")
-        else:
-            upload_dir = _get_upload_dir("main")
-
-        file_path = os.path.join(upload_dir, unique_filename)
-        file.save(file_path)
-
-        if background_type == "video":
-            background_path = _build_upload_url("video", unique_filename)
-        else:
-            background_path = _build_upload_url("main", unique_filename)
-
-        intro_bg = IntroBackground.query.first()
-        if intro_bg:
-            intro_bg.background_path = background_path
-            intro_bg.background_type = background_type
-        else:
-            intro_bg = IntroBackground(background_path=background_path, background_type=background_type)
-            db.session.add(intro_bg)
-        
+        save_settings(intro_background_path=record.url, intro_background_type=background_type)
         db.session.commit()
 
-        security_logger.info(f"Intro background uploaded by IP: {request.remote_addr}, file: {unique_filename}, type: {background_type}")
-        return jsonify({
-            "success": True,
+        return {
             "message": "Фон первой секции успешно загружен",
-            "background_path": background_path,
-            "background_type": background_type
-        })
-    except Exception as e:
-        db.session.rollback()
-        security_logger.error(f"Error uploading intro background: {str(e)}")
-        return jsonify({"success": False, "message": "Ошибка при загрузке фона первой секции"}), 500
+            "background_path": record.url,
+            "background_type": background_type,
+        }
+
+    return _handle_upload(
+        IMAGE_EXTENSIONS | VIDEO_EXTENSIONS,
+        "Intro background",
+        "Ошибка при загрузке фона первой секции",
+        build_response,
+        # moov в начало файла, чтобы видео начинало играть сразу
+        jobs=("video_faststart",),
+    )
 
 @admin_bp.route("/admin/api/links", methods=["GET"])
 @require_login
@@ -461,6 +355,7 @@ def get_links():
 
 @admin_bp.route("/admin/api/links", methods=["POST"])
 @require_login
+@invalidates_content
 def create_link():
     try:
         data = request.json
@@ -516,6 +411,7 @@ def create_link():
 
 @admin_bp.route("/admin/api/links/<int:link_id>", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_link(link_id):
     try:
         link = Link.query.get_or_404(link_id)
@@ -578,6 +474,7 @@ def update_link(link_id):
 
 @admin_bp.route("/admin/api/links/<int:link_id>", methods=["DELETE"])
 @require_login
+@invalidates_content
 def delete_link(link_id):
     try:
         link = Link.query.get_or_404(link_id)
@@ -594,6 +491,7 @@ def delete_link(link_id):
 
 @admin_bp.route("/admin/api/links/reorder", methods=["PUT"])
 @require_login
+@invalidates_content
 def reorder_links():
     try:
         data = request.json
@@ -641,6 +539,7 @@ def get_work_cards_admin():
 
 @admin_bp.route("/admin/api/work-cards", methods=["POST"])
 @require_login
+@invalidates_content
 def create_work_card():
     try:
         data = request.json
@@ -690,6 +589,7 @@ def create_work_card():
 
 @admin_bp.route("/admin/api/work-cards/<int:card_id>", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_work_card(card_id):
     try:
         card = WorkCard.query.get_or_404(card_id)
@@ -746,6 +646,7 @@ def update_work_card(card_id):
 
 @admin_bp.route("/admin/api/work-cards/<int:card_id>", methods=["DELETE"])
 @require_login
+@invalidates_content
 def delete_work_card(card_id):
     try:
         card = WorkCard.query.get_or_404(card_id)
@@ -762,6 +663,7 @@ def delete_work_card(card_id):
 
 @admin_bp.route("/admin/api/work-cards/reorder", methods=["PUT"])
 @require_login
+@invalidates_content
 def reorder_work_cards():
     try:
         data = request.json
@@ -787,53 +689,14 @@ def reorder_work_cards():
 
 @admin_bp.route("/admin/api/upload-work-icon", methods=["POST"])
 @require_login
+@immediate_writes
 def upload_work_icon():
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        allowed_extensions = {"png", "jpg", "jpeg", "gif", "svg", "webp", "ico"}
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-
-        if file_ext not in allowed_extensions:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Недопустимое расширение файла. Разрешены: {', '.join(allowed_extensions)}",
-                    }
-                ),
-                400,
-            )
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = secure_filename(filename)
-        name_without_ext = safe_filename.rsplit(".", 1)[0] if "." in safe_filename else safe_filename
-        unique_filename = f"work-icon_{name_without_ext}_{timestamp}.{file_ext}"
-
-        upload_dir = _get_upload_dir("icons")
-
-        file_path = os.path.join(upload_dir, unique_filename)
-        file.save(file_path)
-
-        icon_path = _build_upload_url("icons", unique_filename)
-
-        security_logger.info(f"Work icon uploaded by IP: {request.remote_addr}, file: {unique_filename}")
-        return jsonify(
-            {
-                "success": True,
-                "message": "Иконка успешно загружена",
-                "icon_path": icon_path,
-            }
-        )
-    except Exception as e:
-        security_logger.error(f"Error uploading work icon: {str(e)}")
-        return jsonify({"success": False, "message": "Ошибка при загрузке иконки"}), 500
+    return _handle_upload(
+        ICON_EXTENSIONS,
+        "Work icon",
+        "Ошибка при загрузке иконки",
+        lambda record: {"message": "Иконка успешно загружена", "icon_path": record.url},
+    )
 
 
 @admin_bp.route("/admin/api/calculator-settings", methods=["GET"])
@@ -843,17 +706,11 @@ def get_calculator_settings():
     if not settings:
         return jsonify({"success": False, "message": "Настройки калькулятора не найдены"}), 404
 
-    import json
-    try:
-        cities = json.loads(settings.cities)
-    except:
-        cities = []
-
     return jsonify(
         {
             "success": True,
             "settings": {
-                "cities": cities,
+                "cities": all_cities(),
                 "warehouse_price_per_deposit": settings.warehouse_price_per_deposit,
                 "warehouse_price_prikop": settings.warehouse_price_prikop,
                 "warehouse_price_magnet": settings.warehouse_price_magnet,
@@ -869,6 +726,7 @@ def get_calculator_settings():
 
 @admin_bp.route("/admin/api/calculator-settings", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_calculator_settings():
     try:
         data = request.json
@@ -887,22 +745,14 @@ def update_calculator_settings():
         if not isinstance(cities, list):
             return jsonify({"success": False, "message": "Города должны быть массивом"}), 400
 
+        city_names = set()
         for city in cities:
-            if not isinstance(city, dict) or "name" not in city or "products" not in city:
-                return (
-                    jsonify({"success": False, "message": "Каждый город должен иметь name и products"}),
-                    400,
-                )
-            if not isinstance(city["products"], list):
-                return jsonify({"success": False, "message": "Товары города должны быть массивом"}), 400
-            for product in city["products"]:
-                if not isinstance(product, dict) or "name" not in product or "price" not in product:
-                    return (
-                        jsonify({"success": False, "message": "Каждый товар в городе должен иметь name и price"}),
-                        400,
-                    )
-                if not isinstance(product["price"], (int, float)) or product["price"] < 0:
-                    return jsonify({"success": False, "message": "Цена товара в городе должна быть положительным числом"}), 400
+            error = validate_city(city)
+            if error:
+                return jsonify({"success": False, "message": error}), 400
+            if city["name"] in city_names:
+                return jsonify({"success": False, "message": f"Город «{city['name']}» указан дважды"}), 400
+            city_names.add(city["name"])
 
         if not isinstance(warehouse_price_per_deposit, (int, float)) or warehouse_price_per_deposit < 0:
             return (
@@ -943,7 +793,6 @@ def update_calculator_settings():
 
         settings = CalculatorSettings.query.first()
         if settings:
-            settings.cities = json.dumps(cities, ensure_ascii=False)
             settings.warehouse_price_per_deposit = float(warehouse_price_per_deposit)
             settings.warehouse_price_prikop = float(warehouse_price_prikop)
             settings.warehouse_price_magnet = float(warehouse_price_magnet)
@@ -955,7 +804,7 @@ def update_calculator_settings():
         else:
             settings = CalculatorSettings(
                 courier_products=json.dumps([], ensure_ascii=False),
-                cities=json.dumps(cities, ensure_ascii=False),
+                cities=json.dumps([], ensure_ascii=False),
                 warehouse_price_per_deposit=float(warehouse_price_per_deposit),
                 warehouse_price_prikop=float(warehouse_price_prikop),
                 warehouse_price_magnet=float(warehouse_price_magnet),
@@ -967,6 +816,7 @@ def update_calculator_settings():
             )
             db.session.add(settings)
 
+        replace_cities(cities)
         db.session.commit()
 
         security_logger.info(f"Calculator settings updated by IP: {request.remote_addr}")
@@ -996,14 +846,57 @@ def update_calculator_settings():
         )
 
 
+@admin_bp.route("/admin/api/calculator/cities/<name>", methods=["PUT"])
+@require_login
+@invalidates_content
+def upsert_calculator_city(name):
+    """
+    Создаёт или обновляет один город калькулятора: {"products": [...]},
+    необязательное "name" переименовывает город. Проверяется и пишется
+    только этот город, остальные не читаются.
+    """
+    try:
+        data = request.get_json() or {}
+        new_name = data.get("name", name)
+        error = validate_city({"name": new_name, "products": data.get("products")})
+        if error:
+            return jsonify({"success": False, "message": error}), 400
+        if new_name != name and find_city(new_name) is not None:
+            return jsonify({"success": False, "message": f"Город «{new_name}» уже существует"}), 409
+
+        city = upsert_city(name, data["products"], new_name=new_name)
+        db.session.commit()
+
+        security_logger.info(f"Calculator city '{city.name}' saved by IP: {request.remote_addr}")
+        return jsonify({"success": True, "message": "Город сохранён", "city": city_to_dict(city)})
+    except Exception as e:
+        db.session.rollback()
+        security_logger.error(f"Error saving calculator city: {str(e)}")
+        return jsonify({"success": False, "message": "Ошибка при сохранении города"}), 500
+
+
+@admin_bp.route("/admin/api/calculator/cities/<name>", methods=["DELETE"])
+@require_login
+@invalidates_content
+def delete_calculator_city(name):
+    city = find_city(name)
+    if city is None:
+        return jsonify({"success": False, "message": "Город не найден"}), 404
+
+    db.session.delete(city)
+    db.session.commit()
+    security_logger.info(f"Calculator city '{name}' deleted by IP: {request.remote_addr}")
+    return jsonify({"success": True, "message": "Город удалён"})
+
+
 @admin_bp.route("/admin/api/settings", methods=["GET"])
 @require_login
 def get_all_settings():
     try:
-        chatbot_settings = ChatBotSettings.query.first()
+        settings = site_settings()
         chatbot_data = {
-            "openai_token": chatbot_settings.openai_token or "" if chatbot_settings else "",
-            "preset": chatbot_settings.preset or "" if chatbot_settings else ""
+            "openai_token": settings["chatbot_openai_token"] or "",
+            "preset": settings["chatbot_preset"] or ""
         }
         
         return jsonify({
@@ -1041,6 +934,7 @@ def get_support_requests():
 
 @admin_bp.route("/admin/api/support-requests/<int:request_id>", methods=["PUT"])
 @require_login
+@immediate_writes
 def update_support_request(request_id):
     try:
         item = SupportRequest.query.get_or_404(request_id)
@@ -1060,6 +954,7 @@ def update_support_request(request_id):
 
 @admin_bp.route("/admin/api/support-requests/<int:request_id>", methods=["DELETE"])
 @require_login
+@immediate_writes
 def delete_support_request(request_id):
     try:
         item = SupportRequest.query.get_or_404(request_id)
@@ -1074,6 +969,7 @@ def delete_support_request(request_id):
 
 @admin_bp.route("/admin/api/settings", methods=["PUT"])
 @require_login
+@invalidates_content
 def update_settings():
     try:
         data = request.json
@@ -1083,32 +979,19 @@ def update_settings():
             openai_token = chatbot_data.get("openai_token", "").strip() if chatbot_data.get("openai_token") else ""
             preset = chatbot_data.get("preset", "").strip() if chatbot_data.get("preset") else ""
 
-            settings = ChatBotSettings.query.first()
-            if settings:
-                settings.openai_token = openai_token
-                settings.preset = preset
-            else:
-                settings = ChatBotSettings(
-                    openai_token=openai_token,
-                    preset=preset
-                )
-                db.session.add(settings)
-
+            save_settings(chatbot_openai_token=openai_token, chatbot_preset=preset)
             db.session.commit()
             security_logger.info(f"Chatbot settings updated by IP: {request.remote_addr}")
 
         if "umami" in data:
             umami_data = data["umami"]
             api_key = (umami_data.get("api_key") or "").strip()
-            website_id = (umami_data.get("website_id") or "").strip() or "6ea99ce5-33ba-4d44-809a-76f429b7e221"
-            settings = UmamiSettings.query.first()
-            if settings:
-                if api_key:
-                    settings.api_key = api_key
-                settings.website_id = website_id
+            website_id = (umami_data.get("website_id") or "").strip() or DEFAULT_UMAMI_WEBSITE_ID
+            # Пустой ключ в форме означает «не менять сохранённый»
+            if api_key:
+                save_settings(umami_api_key=api_key, umami_website_id=website_id)
             else:
-                settings = UmamiSettings(api_key=api_key, website_id=website_id)
-                db.session.add(settings)
+                save_settings(umami_website_id=website_id)
             db.session.commit()
             security_logger.info(f"Umami settings updated by IP: {request.remote_addr}")
 
@@ -1129,16 +1012,16 @@ def update_settings():
 @require_login
 def umami_proxy_stats():
     try:
-        settings = UmamiSettings.query.first()
-        if not settings or not settings.api_key:
+        settings = site_settings()
+        if not settings["umami_api_key"]:
             return jsonify({"success": False, "error": "Umami API key not configured"}), 400
-        website_id = settings.website_id or "6ea99ce5-33ba-4d44-809a-76f429b7e221"
+        website_id = settings["umami_website_id"] or DEFAULT_UMAMI_WEBSITE_ID
         start_at = request.args.get("startAt", type=int)
         end_at = request.args.get("endAt", type=int)
         if not start_at or not end_at:
             return jsonify({"success": False, "error": "startAt and endAt required"}), 400
         url = f"{UMAMI_API_BASE}/websites/{website_id}/stats"
-        headers = {"Accept": "application/json", "x-umami-api-key": settings.api_key}
+        headers = {"Accept": "application/json", "x-umami-api-key": settings["umami_api_key"]}
         r = requests.get(url, headers=headers, params={"startAt": start_at, "endAt": end_at}, timeout=15)
         r.raise_for_status()
         return jsonify(r.json())
@@ -1154,17 +1037,17 @@ def umami_proxy_stats():
 @require_login
 def umami_proxy_metrics():
     try:
-        settings = UmamiSettings.query.first()
-        if not settings or not settings.api_key:
+        settings = site_settings()
+        if not settings["umami_api_key"]:
             return jsonify({"success": False, "error": "Umami API key not configured"}), 400
-        website_id = settings.website_id or "6ea99ce5-33ba-4d44-809a-76f429b7e221"
+        website_id = settings["umami_website_id"] or DEFAULT_UMAMI_WEBSITE_ID
         start_at = request.args.get("startAt", type=int)
         end_at = request.args.get("endAt", type=int)
         metric_type = request.args.get("type", "country")
         if not start_at or not end_at:
             return jsonify({"success": False, "error": "startAt and endAt required"}), 400
         url = f"{UMAMI_API_BASE}/websites/{website_id}/metrics"
-        headers = {"Accept": "application/json", "x-umami-api-key": settings.api_key}
+        headers = {"Accept": "application/json", "x-umami-api-key": settings["umami_api_key"]}
         params = {"startAt": start_at, "endAt": end_at, "type": metric_type}
         r = requests.get(url, headers=headers, params=params, timeout=15)
         r.raise_for_status()
@@ -1179,8 +1062,8 @@ def umami_proxy_metrics():
 
 @admin_bp.route("/admin/api/pages/<page_type>", methods=["GET", "PUT"])
 @require_login
+@invalidates_content
 def manage_page_content(page_type):
-    import json
     if request.method == "GET":
         page = PageContent.query.filter_by(page_type=page_type).first()
         if not page:
@@ -1193,42 +1076,12 @@ def manage_page_content(page_type):
                 }
             )
 
-        try:
-            raw_products = json.loads(page.products) if page.products else []
-        except Exception:
-            raw_products = []
-
-        normalized_products = []
-        for idx, item in enumerate(raw_products):
-            if not isinstance(item, dict):
-                continue
-            name = item.get("name", "")
-            description = item.get("description", "")
-            image_path = item.get("image_path", "")
-            prices = item.get("prices")
-            if not isinstance(prices, list):
-                single_price = item.get("price")
-                if single_price is not None and single_price != "":
-                    prices = [{"weight": "", "price": str(single_price)}]
-                else:
-                    prices = []
-
-            normalized_products.append(
-                {
-                    "id": item.get("id", idx + 1),
-                    "name": name,
-                    "description": description,
-                    "image_path": image_path,
-                    "prices": prices,
-                }
-            )
-
         return jsonify(
             {
                 "success": True,
                 "top_text": page.top_text or "",
                 "bottom_text": page.bottom_text or "",
-                "products": normalized_products,
+                "products": list_products(page_type),
             }
         )
     
@@ -1242,7 +1095,7 @@ def manage_page_content(page_type):
         
         page.top_text = data.get("top_text", "")
         page.bottom_text = data.get("bottom_text", "")
-        page.products = json.dumps(data.get("products", []))
+        replace_products(page_type, data.get("products", []))
         
         db.session.commit()
         return jsonify({"success": True, "message": "Страница успешно обновлена"})
@@ -1250,26 +1103,21 @@ def manage_page_content(page_type):
 
 @admin_bp.route("/admin/api/pages/<page_type>/products", methods=["POST"])
 @require_login
+@invalidates_content
 def add_page_product(page_type):
-    import json
     data = request.get_json()
     page = PageContent.query.filter_by(page_type=page_type).first()
     
     if not page:
-        page = PageContent(page_type=page_type, products="[]")
+        page = PageContent(page_type=page_type)
         db.session.add(page)
     
-    try:
-        products = json.loads(page.products) if page.products else []
-    except:
-        products = []
-    
-    new_product = {
+    add_product(page_type, {
         "name": data.get("name", ""),
-        "description": data.get("description", "")
-    }
-    products.append(new_product)
-    page.products = json.dumps(products)
+        "description": data.get("description", ""),
+        "image_path": data.get("image_path", ""),
+        "prices": data.get("prices"),
+    })
     
     db.session.commit()
     return jsonify({"success": True, "message": "Товар добавлен"})
@@ -1277,42 +1125,30 @@ def add_page_product(page_type):
 
 @admin_bp.route("/admin/api/pages/<page_type>/products/<int:product_id>", methods=["PUT", "DELETE"])
 @require_login
+@invalidates_content
 def manage_page_product(page_type, product_id):
-    import json
-    page = PageContent.query.filter_by(page_type=page_type).first()
-    
-    if not page:
-        return jsonify({"success": False, "message": "Страница не найдена"}), 404
-    
-    try:
-        products = json.loads(page.products) if page.products else []
-    except:
-        products = []
+    # product_id — номер товара в списке страницы, как и раньше
+    product = product_at(page_type, product_id)
     
-    if product_id >= len(products):
+    if not product:
         return jsonify({"success": False, "message": "Товар не найден"}), 404
     
     if request.method == "PUT":
         data = request.get_json()
-        products[product_id] = {
-            "name": data.get("name", ""),
-            "description": data.get("description", "")
-        }
-        page.products = json.dumps(products)
+        update_product(product, data)
         db.session.commit()
         return jsonify({"success": True, "message": "Товар обновлен"})
     
     elif request.method == "DELETE":
-        products.pop(product_id)
-        page.products = json.dumps(products)
+        delete_product(product)
         db.session.commit()
         return jsonify({"success": True, "message": "Товар удален"})
 
 
 @admin_bp.route("/admin/api/promotions", methods=["GET", "PUT"])
 @require_login
+@invalidates_content
 def manage_promotions():
-    import json
     if request.method == "GET":
         page = PromotionsPage.query.first()
         if not page:
@@ -1325,42 +1161,12 @@ def manage_promotions():
                 }
             )
 
-        try:
-            raw_products = json.loads(page.products) if page.products else []
-        except Exception:
-            raw_products = []
-
-        normalized_products = []
-        for idx, item in enumerate(raw_products):
-            if not isinstance(item, dict):
-                continue
-            name = item.get("name", "")
-            description = item.get("description", "")
-            image_path = item.get("image_path", "")
-            prices = item.get("prices")
-            if not isinstance(prices, list):
-                single_price = item.get("price")
-                if single_price is not None and single_price != "":
-                    prices = [{"weight": "", "price": str(single_price)}]
-                else:
-                    prices = []
-
-            normalized_products.append(
-                {
-                    "id": item.get("id", idx + 1),
-                    "name": name,
-                    "description": description,
-                    "image_path": image_path,
-                    "prices": prices,
-                }
-            )
-
         return jsonify(
             {
                 "success": True,
                 "text": page.text or "",
                 "image_path": page.image_path or "",
-                "products": normalized_products,
+                "products": list_products(PROMOTIONS_PAGE),
             }
         )
     
@@ -1376,7 +1182,7 @@ def manage_promotions():
         if "image_path" in data:
             page.image_path = data.get("image_path", "")
         if "products" in data:
-            page.products = json.dumps(data.get("products", []))
+            replace_products(PROMOTIONS_PAGE, data.get("products", []))
         
         db.session.commit()
         return jsonify({"success": True, "message": "Страница акций успешно обновлена"})
@@ -1384,27 +1190,22 @@ def manage_promotions():
 
 @admin_bp.route("/admin/api/promotions/products", methods=["POST"])
 @require_login
+@invalidates_content
 def add_promotion_product():
-    import json
     data = request.get_json()
     page = PromotionsPage.query.first()
     
     if not page:
-        page = PromotionsPage(products="[]")
+        page = PromotionsPage()
         db.session.add(page)
     
-    try:
-        products = json.loads(page.products) if page.products else []
-    except:
-        products = []
-    
-    new_product = {
+    add_product(PROMOTIONS_PAGE, {
         "name": data.get("name", ""),
         "description": data.get("description", ""),
-        "price": data.get("price", "")
-    }
-    products.append(new_product)
-    page.products = json.dumps(products)
+        "image_path": data.get("image_path", ""),
+        "prices": data.get("prices"),
+        "price": data.get("price", ""),
+    })
     
     db.session.commit()
     return jsonify({"success": True, "message": "Товар добавлен в прайс"})
@@ -1412,127 +1213,60 @@ def add_promotion_product():
 
 @admin_bp.route("/admin/api/promotions/products/<int:product_id>", methods=["PUT", "DELETE"])
 @require_login
+@invalidates_content
 def manage_promotion_product(product_id):
-    import json
-    page = PromotionsPage.query.first()
-    
-    if not page:
-        return jsonify({"success": False, "message": "Страница не найдена"}), 404
-    
-    try:
-        products = json.loads(page.products) if page.products else []
-    except:
-        products = []
+    product = product_at(PROMOTIONS_PAGE, product_id)
     
-    if product_id >= len(products):
+    if not product:
         return jsonify({"success": False, "message": "Товар не найден"}), 404
     
     if request.method == "PUT":
         data = request.get_json()
-        products[product_id] = {
-            "name": data.get("name", ""),
-            "description": data.get("description", ""),
-            "price": data.get("price", "")
-        }
-        page.products = json.dumps(products)
+        update_product(product, data)
         db.session.commit()
         return jsonify({"success": True, "message": "Товар обновлен"})
     
     elif request.method == "DELETE":
-        products.pop(product_id)
-        page.products = json.dumps(products)
+        delete_product(product)
         db.session.commit()
         return jsonify({"success": True, "message": "Товар удален из прайса"})
 
 
 @admin_bp.route("/admin/api/upload-promotions-image", methods=["POST"])
 @require_login
+@immediate_writes
 def upload_promotions_image():
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        allowed_extensions = {"png", "jpg", "jpeg", "gif", "svg", "webp"}
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-
-        if file_ext not in allowed_extensions:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Недопустимое расширение файла. Разрешены: {', '.join(allowed_extensions)}",
-                    }
-                ),
-                400,
-            )
-
-        if file.content_length and file.content_length > 15 * 1024 * 1024:
-            return jsonify({"success": False, "message": "Размер файла не должен превышать 15 МБ"}), 400
-
-        secure_name = secure_filename(filename)
-        upload_dir = _get_upload_dir("promotions")
-        file_path = os.path.join(upload_dir, secure_name)
-        file.save(file_path)
-        image_url = _build_upload_url("promotions", secure_name)
-
-        return jsonify({"success": True, "image_path": image_url})
-    except Exception as e:
-        security_logger.error(f"Error uploading promotions image: {str(e)}")
-        return jsonify({"success": False, "message": f"Ошибка при загрузке изображения: {str(e)}"}), 500
+    return _handle_upload(
+        IMAGE_EXTENSIONS,
+        "Promotions image",
+        "Ошибка при загрузке изображения",
+        lambda record: {"image_path": record.url},
+        max_size=MAX_IMAGE_UPLOAD_SIZE,
+    )
 
 
 @admin_bp.route("/admin/api/upload-product-image", methods=["POST"])
 @require_login
+@immediate_writes
 def upload_product_image():
     """
     Загрузка изображений для товаров (страницы Отправки, Опт, Акции).
-    Файлы сохраняются в data/uploads/products и доступны по /uploads/products/...
+    Файлы сохраняются по хэшу в data/uploads/blobs и доступны по /uploads/blobs/...
     """
-    try:
-        if "file" not in request.files:
-            return jsonify({"success": False, "message": "Файл не найден"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"success": False, "message": "Файл не выбран"}), 400
-
-        allowed_extensions = {"png", "jpg", "jpeg", "gif", "webp"}
-        filename = file.filename
-        file_ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
-
-        if file_ext not in allowed_extensions:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Недопустимое расширение файла. Разрешены: {', '.join(allowed_extensions)}",
-                    }
-                ),
-                400,
-            )
-
-        if file.content_length and file.content_length > 15 * 1024 * 1024:
-            return jsonify({"success": False, "message": "Размер файла не должен превышать 15 МБ"}), 400
-
-        safe_name = secure_filename(filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        name_without_ext = safe_name.rsplit(".", 1)[0] if "." in safe_name else safe_name
-        unique_name = f"product_{name_without_ext}_{timestamp}.{file_ext}"
-
-        upload_dir = _get_upload_dir("products")
-        file_path = os.path.join(upload_dir, unique_name)
-        file.save(file_path)
-
-        image_url = _build_upload_url("products", unique_name)
-        security_logger.info(f"Product image uploaded by IP: {request.remote_addr}, file: {unique_name}")
+    return _handle_upload(
+        IMAGE_EXTENSIONS - {"svg"},
+        "Product image",
+        "Ошибка при загрузке изображения товара",
+        lambda record: {"image_path": record.url},
+        max_size=MAX_IMAGE_UPLOAD_SIZE,
+    )
 
-        return jsonify({"success": True, "image_path": image_url})
-    except Exception as e:
-        security_logger.error(f"Error uploading product image: {str(e)}")
-        return jsonify({"success": False, "message": f"Ошибка при загрузке изображения товара: {str(e)}"}), 500
 
+@admin_bp.route("/admin/api/jobs/<int:job_id>", methods=["GET"])
+@require_login
+def get_job(job_id):
+    """Статус фоновой задачи (админка опрашивает после загрузки)."""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Задача не найдена"}), 404
+    return jsonify({"success": True, "job": job_to_dict(job)})
@@ -1,18 +1,11 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_wtf.csrf import generate_csrf
-from models import (
-    Link,
-    SiteIcon,
-    WorkCard,
-    CalculatorSettings,
-    IntroButtonLink,
-    ContactUsButtonLink,
-    IntroBackground,
-    ChatBotSettings,
-    SupportRequest,
-    PageContent,
-    PromotionsPage,
-)
+from models import SupportRequest
+from cities import city_names
+from content import PAGE_TYPES, city_content, home_content, page_content, promotions_content, settings_content
+from content_cache import cached_content, conditional_content, json_response_cached
+from pricing import QuoteError, quote_many
+from site_settings import site_settings
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -21,118 +14,100 @@ def get_csrf_token():
     token = generate_csrf()
     return jsonify({'csrf_token': token})
 
+def _home():
+    return cached_content('home', home_content)
+
 @api_bp.route('/get_site_icon')
+@conditional_content
 def get_site_icon():
-    site_icon = SiteIcon.query.first()
-    return jsonify({
-        'icon_path': site_icon.icon_path if site_icon else None
+    return json_response_cached('site_icon', lambda: {
+        'icon_path': _home()['site_icon']
     })
 
 @api_bp.route('/get_links')
+@conditional_content
 def get_links():
-    links_list = Link.query.order_by(Link.order).all()
-
-    links_data = [
-        {
-            'id': link.id,
-            'text': link.text,
-            'url': link.url,
-            'icon': link.icon,
-            'order': link.order
-        } for link in links_list
-    ]
-
-    return jsonify({'links': links_data})
+    return json_response_cached('links', lambda: {'links': _home()['links']})
 
 @api_bp.route('/get_calculator_settings')
+@conditional_content
 def get_calculator_settings():
-    settings = CalculatorSettings.query.first()
-    if not settings:
-        import json
-        default_cities = [
-            {
-                "name": "Москва",
-                "products": [
-                    {"name": "Яблоки", "price": 900},
-                    {"name": "Груши", "price": 900},
-                    {"name": "Апельсины", "price": 900}
-                ]
-            }
-        ]
-        default_price = 4225.0
-        return jsonify({
-            'cities': default_cities,
-            'warehouse_price_per_deposit': default_price,
-            'warehouse_price_prikop': default_price,
-            'warehouse_price_magnet': default_price,
-            'weeks_per_month': 4.33,
-            'packing_bonus': 1100.0,
-            'chemist_kg_price': 120000.0,
-            'carrier_with_weight_price_per_step': 100000.0,
-            'carrier_without_weight_price_per_step': 2000.0,
-        })
-
-    import json
+    return json_response_cached('calculator_settings', lambda: _home()['calculator_settings'])
+
+@api_bp.route('/calculator/cities/<name>')
+@conditional_content
+def get_calculator_city(name):
+    # Неизвестные имена отсекаются по списку городов, чтобы не засорять кэш
+    names = cached_content('calculator_city_names', lambda: {city['name'] for city in city_names()})
+    if name not in names:
+        return jsonify({'success': False, 'message': 'Город не найден'}), 404
+    return json_response_cached(f'calculator/cities/{name}', lambda: city_content(name))
+
+def _quote_response(requests, batch):
     try:
-        cities = json.loads(settings.cities)
-    except:
-        cities = []
-
-    return jsonify({
-        'cities': cities,
-        'warehouse_price_per_deposit': settings.warehouse_price_per_deposit,
-        'warehouse_price_prikop': settings.warehouse_price_prikop,
-        'warehouse_price_magnet': settings.warehouse_price_magnet,
-        'weeks_per_month': settings.weeks_per_month,
-        'packing_bonus': settings.packing_bonus,
-        'chemist_kg_price': getattr(settings, 'chemist_kg_price', None) or 120000.0,
-        'carrier_with_weight_price_per_step': getattr(settings, 'carrier_with_weight_price_per_step', None) or 100000.0,
-        'carrier_without_weight_price_per_step': getattr(settings, 'carrier_without_weight_price_per_step', None) or 2000.0,
-    })
+        quotes = quote_many(requests)
+    except QuoteError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if batch:
+        return jsonify({'success': True, 'quotes': quotes})
+    return jsonify({'success': True, 'quote': quotes[0]})
+
+@api_bp.route('/calculator/quote', methods=['GET'])
+@conditional_content
+def get_calculator_quote():
+    """Один расчёт по параметрам строки запроса (кэшируется по ETag версии)."""
+    return _quote_response([request.args.to_dict()], batch=False)
+
+@api_bp.route('/calculator/quote', methods=['POST'])
+def post_calculator_quote():
+    """
+    Расчёт дохода: объект — один расчёт, список или {"quotes": [...]} —
+    пачка (до pricing.MAX_BATCH) в порядке запроса.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        return _quote_response(data, batch=True)
+    if isinstance(data, dict) and 'quotes' in data:
+        if not isinstance(data['quotes'], list):
+            return jsonify({'success': False, 'message': 'quotes должно быть массивом'}), 400
+        return _quote_response(data['quotes'], batch=True)
+    return _quote_response([data], batch=False)
 
 @api_bp.route('/get_work_cards')
+@conditional_content
 def get_work_cards():
-    cards_list = WorkCard.query.order_by(WorkCard.order).all()
-
-    cards_data = [
-        {
-            'id': card.id,
-            'title': card.title,
-            'icon': card.icon,
-            'text': card.text,
-            'link': card.link,
-            'order': card.order
-        } for card in cards_list
-    ]
-
-    return jsonify({'cards': cards_data})
+    return json_response_cached('work_cards', lambda: {'cards': _home()['work_cards']})
 
 @api_bp.route('/get_intro_button_link')
+@conditional_content
 def get_intro_button_link():
-    intro_link = IntroButtonLink.query.first()
-    if intro_link:
-        return jsonify({'link': intro_link.link})
-    return jsonify({'link': '#about'})
+    return json_response_cached('intro_button_link', lambda: {'link': _home()['intro_button_link']})
 
 @api_bp.route('/get_intro_background')
+@conditional_content
 def get_intro_background():
-    intro_bg = IntroBackground.query.first()
-    if intro_bg:
-        return jsonify({
-            'background_path': intro_bg.background_path,
-            'background_type': intro_bg.background_type
-        })
-    return jsonify({
-        'background_path': '/assets/img/main/intro-bg.png',
-        'background_type': 'image'
-    })
+    return json_response_cached('intro_background', lambda: _home()['intro_background'])
 
 @api_bp.route('/get_contact_us_button_link')
+@conditional_content
 def get_contact_us_button_link():
-    contact_link = ContactUsButtonLink.query.first()
-    if contact_link:
-        return jsonify({'link': contact_link.link})
-    return jsonify({'link': '#'})
+    return json_response_cached('contact_us_button_link', lambda: {'link': _home()['contact_us_button_link']})
+
+@api_bp.route('/bootstrap')
+@api_bp.route('/home')
+@conditional_content
+def get_home_content():
+    """
+    Все данные главной страницы одним ответом: иконка сайта, ссылки,
+    кнопки, фон первой секции, карточки работы и настройки калькулятора.
+    Отдельные эндпоинты выше оставлены для обратной совместимости.
+    """
+    return json_response_cached('home', lambda: {**_home(), 'success': True})
+
+@api_bp.route('/get_settings')
+@conditional_content
+def get_settings():
+    return json_response_cached('settings', lambda: settings_content(_home()))
 
 @api_bp.route('/chatbot/message', methods=['POST'])
 def chatbot_message():
@@ -146,18 +121,18 @@ def chatbot_message():
         if not user_message:
             return jsonify({'success': False, 'error': 'Сообщение не может быть пустым'}), 400
         
-        settings = ChatBotSettings.query.first()
-        if not settings or not settings.openai_token:
+        settings = site_settings()
+        if not settings['chatbot_openai_token']:
             return jsonify({'success': False, 'error': 'Токен OpenAI не настроен'}), 500
         
-        client = openai.OpenAI(api_key=settings.openai_token)
+        client = openai.OpenAI(api_key=settings['chatbot_openai_token'])
         
         messages = []
         
-        if settings.preset:
+        if settings['chatbot_preset']:
             messages.append({
                 'role': 'system',
-                'content': settings.preset
+                'content': settings['chatbot_preset']
             })
         
         messages.append({
@@ -239,108 +214,14 @@ def create_support_request():
         return jsonify({'success': False, 'message': f'Ошибка при отправке заявки: {str(e)}'}), 500
 
 @api_bp.route('/pages/<page_type>')
+@conditional_content
 def get_page_content(page_type):
-    import json
-    page = PageContent.query.filter_by(page_type=page_type).first()
-    if not page:
-        return jsonify(
-            {
-                "success": True,
-                "top_text": "",
-                "bottom_text": "",
-                "products": [],
-            }
-        )
-    
-    try:
-        raw_products = json.loads(page.products) if page.products else []
-    except Exception:
-        raw_products = []
-
-    normalized_products = []
-    for idx, item in enumerate(raw_products):
-        if not isinstance(item, dict):
-            continue
-        name = item.get("name", "")
-        description = item.get("description", "")
-        image_path = item.get("image_path", "")
-        prices = item.get("prices")
-        # Обратная совместимость для старого формата с одиночным полем price
-        if not isinstance(prices, list):
-            single_price = item.get("price")
-            if single_price is not None and single_price != "":
-                prices = [{"weight": "", "price": str(single_price)}]
-            else:
-                prices = []
-
-        normalized_products.append(
-            {
-                "id": item.get("id", idx + 1),
-                "name": name,
-                "description": description,
-                "image_path": image_path,
-                "prices": prices,
-            }
-        )
-
-    return jsonify(
-        {
-            "success": True,
-            "top_text": page.top_text or "",
-            "bottom_text": page.bottom_text or "",
-            "products": normalized_products,
-        }
-    )
+    # Неизвестные страницы не доходят до кэша: иначе случайные адреса вытесняли бы его
+    if page_type not in PAGE_TYPES:
+        return jsonify({'success': False, 'message': 'Страница не найдена'}), 404
+    return json_response_cached(f'pages/{page_type}', lambda: page_content(page_type))
 
 @api_bp.route('/promotions')
+@conditional_content
 def get_promotions():
-    import json
-    page = PromotionsPage.query.first()
-    if not page:
-        return jsonify(
-            {
-                "success": True,
-                "text": "",
-                "image_path": "",
-                "products": [],
-            }
-        )
-    
-    try:
-        raw_products = json.loads(page.products) if page.products else []
-    except Exception:
-        raw_products = []
-
-    normalized_products = []
-    for idx, item in enumerate(raw_products):
-        if not isinstance(item, dict):
-            continue
-        name = item.get("name", "")
-        description = item.get("description", "")
-        image_path = item.get("image_path", "")
-        prices = item.get("prices")
-        if not isinstance(prices, list):
-            single_price = item.get("price")
-            if single_price is not None and single_price != "":
-                prices = [{"weight": "", "price": str(single_price)}]
-            else:
-                prices = []
-
-        normalized_products.append(
-            {
-                "id": item.get("id", idx + 1),
-                "name": name,
-                "description": description,
-                "image_path": image_path,
-                "prices": prices,
-            }
-        )
-
-    return jsonify(
-        {
-            "success": True,
-            "text": page.text or "",
-            "image_path": page.image_path or "",
-            "products": normalized_products,
-        }
-    )
+    return json_response_cached('promotions', promotions_content)
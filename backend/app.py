@@ -1,14 +1,28 @@
-from flask import Flask, send_from_directory, request, jsonify, redirect, url_for
+from flask import Flask, abort, send_from_directory, request, jsonify, redirect, url_for
 from flask_cors import CORS
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
 import logging
 import traceback
 
-from models import db, init_all_models, SiteIcon
+from models import db
+from database import configure_database, init_database, start_checkpointer
+from migrations import run_migrations
+from content import home_content
+from compression import compress_response, negotiate_encoding
+from content_cache import cached_content, current_content_version, dumps_json, on_content_changed
+from snapshots import publish_snapshots
+from uploads import VIDEO_EXTENSIONS
+from favicon import site_icon_response
+from jobs import start_workers
+from media import send_media
+from resize import send_resized
+from offload import init_offload, send_from_root
+from static_assets import ENCODING_EXTENSIONS, IMMUTABLE_MAX_AGE, get_asset, load_app_manifest, send_asset, serve_static_asset
 from api_routes import api_bp
 from admin_routes import admin_bp
 
@@ -64,82 +78,211 @@ logging.basicConfig(
     ]
 )
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(data_dir, "app.db")}'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+app.config['SQLITE_MMAP_MB'] = int(os.getenv('SQLITE_MMAP_MB', '256'))
+app.config['SQLITE_CACHE_MB'] = int(os.getenv('SQLITE_CACHE_MB', '16'))
+app.config['SQLITE_CHECKPOINT_SECONDS'] = int(os.getenv('SQLITE_CHECKPOINT_SECONDS', '60'))
+configure_database(app, os.path.join(data_dir, "app.db"))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
+app.config['CONTENT_VERSION_FILE'] = os.path.join(data_dir, 'content.version')
+app.config['MIGRATION_LOCK_FILE'] = os.path.join(data_dir, 'migrate.lock')
+app.config['SNAPSHOT_DIR'] = os.getenv('SNAPSHOT_DIR', os.path.join(static_folder, 'content'))
+app.config['SNAPSHOT_MAX_AGE'] = int(os.getenv('SNAPSHOT_MAX_AGE', '300'))
+app.config['INLINE_INITIAL_DATA'] = os.getenv('INLINE_INITIAL_DATA', 'False') == 'True'
+app.config['UPLOADS_DIR'] = uploads_dir
+app.config['FAVICON_MAX_AGE'] = int(os.getenv('FAVICON_MAX_AGE', '604800'))
+app.config['MEDIA_MAX_AGE'] = int(os.getenv('MEDIA_MAX_AGE', '31536000'))
+app.config['FILE_OFFLOAD'] = os.getenv('FILE_OFFLOAD', '').strip().lower()
+app.config['ACCEL_UPLOADS_PREFIX'] = os.getenv('ACCEL_UPLOADS_PREFIX', '/_accel/uploads/')
+app.config['ACCEL_STATIC_PREFIX'] = os.getenv('ACCEL_STATIC_PREFIX', '/_accel/dist/')
+app.config['RESIZE_CACHE_MAX_BYTES'] = int(os.getenv('RESIZE_CACHE_MAX_MB', '512')) * 1024 * 1024
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', '1'))
+init_offload(app)
 
 db.init_app(app)
+init_database(app)
 
 csrf.exempt(api_bp)
 
 app.register_blueprint(api_bp)
 app.register_blueprint(admin_bp)
 
-_db_initialized = False
-
 def init_db():
-    global _db_initialized
-    if not _db_initialized:
-        try:
-            with app.app_context():
-                init_all_models()
-            _db_initialized = True
-        except Exception as e:
-            logging.getLogger(__name__).exception("init_db failed: %s", e)
-            raise
-
-@app.before_request
-def before_first_request():
+    """
+    Миграции схемы и данные по умолчанию — один раз при старте процесса.
+    Соединения закрываются, чтобы не унаследовать их после fork в gunicorn.
+    """
+    try:
+        with app.app_context():
+            run_migrations()
+            publish_snapshots()
+            db.engine.dispose()
+    except Exception as e:
+        logging.getLogger(__name__).exception("init_db failed: %s", e)
+        raise
+
+def start_background_workers():
+    """
+    Фоновые потоки: очередь задач (jobs.py) и WAL checkpoint. Запускаются
+    один раз в процессе воркера — из gunicorn.conf.py (post_worker_init,
+    уже после fork) или при запуске через python app.py, а не на запросах.
+    """
+    start_workers(app)
+    start_checkpointer(app)
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Применить миграции БД (для запуска на этапе деплоя)."""
     init_db()
 
+if os.getenv('RUN_MIGRATIONS_ON_START', 'True') == 'True':
+    init_db()
+
+on_content_changed(publish_snapshots)
+
+# Статика dist отдаётся по манифесту, собранному один раз при старте
+load_app_manifest(app)
+app.view_functions['static'] = serve_static_asset
+
+@app.after_request
+def compress_json_response(response):
+    return compress_response(response, request.accept_encodings)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_spa(path):
     if path.startswith('admin'):
         return redirect(url_for('admin.admin_panel'))
 
-    if path and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
+    entry = get_asset(path) if path else None
+    if entry is not None:
+        return send_asset(entry)
 
-    index_path = os.path.join(app.static_folder, 'index.html')
-    if os.path.exists(index_path):
-        return send_from_directory(app.static_folder, 'index.html')
+    index_entry = get_asset('index.html')
+    if index_entry is not None:
+        if app.config['INLINE_INITIAL_DATA']:
+            return render_index(index_entry)
+        return send_asset(index_entry)
 
     return jsonify({'error': 'Frontend not built'}), 404
 
 
+_rendered_index = {'key': None, 'body': None}
+
+
+def render_index(index_entry):
+    """
+    index.html со встроенным <script id="initial-data"> с данными главной
+    страницы, чтобы фронтенд отрисовался без запросов к API. Готовая
+    страница хранится в памяти и пересобирается только при смене версии
+    контента или нового билда dist.
+    """
+    key = (index_entry['etag'], current_content_version())
+    if _rendered_index['key'] != key:
+        with open(index_entry['path'], 'rb') as f:
+            template = f.read()
+        data = dumps_json({**cached_content('home', home_content), 'success': True})
+        script = b'<script id="initial-data" type="application/json">' + data.replace(b'<', b'\\u003c') + b'</script>'
+        _rendered_index['body'] = template.replace(b'</head>', script + b'</head>', 1)
+        _rendered_index['key'] = key
+
+    response = app.response_class(_rendered_index['body'], mimetype='text/html')
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route('/content/<path:filename>')
+def serve_snapshot(filename):
+    """
+    Статические снимки контента (см. snapshots.py). В продакшене их может
+    отдавать сам прокси; если файла нет — JSON 404, фронтенд уйдёт в /api.
+    """
+    snapshot_dir = app.config['SNAPSHOT_DIR']
+    snapshot_path = safe_join(snapshot_dir, filename)
+    if snapshot_path is None or not os.path.isfile(snapshot_path):
+        return jsonify({'error': 'Not Found', 'path': request.path}), 404
+
+    # Рядом со снимком лежат .br/.gz (см. publish_snapshots)
+    coding = negotiate_encoding(request.accept_encodings)
+    if coding and os.path.isfile(snapshot_path + ENCODING_EXTENSIONS[coding]):
+        response = send_from_directory(
+            snapshot_dir,
+            filename + ENCODING_EXTENSIONS[coding],
+            mimetype='application/json',
+            max_age=app.config['SNAPSHOT_MAX_AGE'],
+        )
+        response.headers['Content-Encoding'] = coding
+    else:
+        response = send_from_directory(snapshot_dir, filename, max_age=app.config['SNAPSHOT_MAX_AGE'])
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    return response
+
+
 @app.route('/uploads/<path:filename>')
 def serve_uploads(filename):
-    return send_from_directory(uploads_dir, filename)
+    """
+    Видео (фон первой секции) отдаются с поддержкой Range через media.py.
+    ?w=&fmt= — уменьшенная копия картинки из дискового кэша (resize.py).
+    Файлы в blobs/ адресуются хэшем содержимого и никогда не меняются,
+    поэтому кэшируются навсегда; старые загрузки — с ревалидацией.
+    """
+    if filename.startswith('blobs/tmp/'):
+        abort(404)
+
+    prefix = app.config['ACCEL_UPLOADS_PREFIX']
+    if filename.rsplit('.', 1)[-1].lower() in VIDEO_EXTENSIONS:
+        return send_media(uploads_dir, filename, prefix)
+
+    if 'w' in request.args or 'fmt' in request.args:
+        response = send_resized(uploads_dir, filename, prefix)
+    else:
+        response = send_from_root(uploads_dir, filename, prefix)
+    if filename.startswith('blobs/'):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
 
 
 @app.route('/favicon.ico')
 def favicon():
     """
     Возвращает favicon для сайта.
-    1. Если в БД есть кастомная иконка (SiteIcon) — делаем редирект на неё (например, /uploads/site/...)
-    2. Если кастомной нет — пробуем отдать статический favicon.ico из собранного фронтенда.
+    1. Если в админке загружена иконка (настройка site_icon_path) — отдаём её из памяти:
+       подготовленный при загрузке .ico или сам файл.
+    2. Если кастомной нет — статический favicon.ico из собранного фронтенда.
     """
     try:
-        icon = SiteIcon.query.first()
-        if icon and icon.icon_path:
-            # icon_path уже начинается с /uploads/..., просто редиректим
-            return redirect(icon.icon_path)
+        response = site_icon_response('favicon.ico')
+        if response is not None:
+            return response
     except Exception:
         # не ломаем сайт, если что-то пошло не так при чтении БД
-        pass
+        logging.getLogger(__name__).exception("favicon lookup failed")
 
     # Фолбэк: отдать favicon.ico из dist, если он там есть
-    static_favicon = os.path.join(app.static_folder, 'favicon.ico')
-    if os.path.exists(static_favicon):
-        return send_from_directory(app.static_folder, 'favicon.ico')
+    static_favicon = get_asset('favicon.ico')
+    if static_favicon is not None:
+        return send_asset(static_favicon)
 
     # Если ничего нет — пустой ответ
     return ('', 204)
 
+
+@app.route('/apple-touch-icon.png')
+def apple_touch_icon():
+    response = site_icon_response('apple-touch-icon.png')
+    if response is None:
+        return ('', 404)
+    return response
+
 @app.errorhandler(404)
 def not_found_error(error):
-    if request.path.startswith('/admin/api/'):
+    # Промахи по API отдают короткий JSON и никогда не уходят в SPA
+    if request.path.startswith('/api/') or request.path.startswith('/admin/api/'):
         return jsonify({
             'error': 'Not Found',
             'message': 'The requested resource was not found',
@@ -189,7 +332,6 @@ def forbidden_error(error):
     return redirect('/admin/login')
 
 if __name__ == '__main__':
-    with app.app_context():
-        init_all_models()
     debug_mode = os.getenv('FLASK_DEBUG', 'False') == 'True'
+    start_background_workers()
     app.run(debug=debug_mode, host='0.0.0.0', port=5000)
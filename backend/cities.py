@@ -0,0 +1,134 @@
+import json
+
+from sqlalchemy import func
+
+from models import db, CalculatorSettings, City, CityProductPrice
+
+
+def plain_number(value):
+    """Целые цены отдаются без .0 — как раньше лежали в JSON."""
+    return int(value) if float(value).is_integer() else value
+
+
+def city_to_dict(city):
+    return {
+        "name": city.name,
+        "products": [{"name": price.product, "price": plain_number(price.price)} for price in city.prices],
+    }
+
+
+def city_names():
+    """Список городов для выпадающего списка, без цен: один лёгкий запрос."""
+    return [{"name": name} for (name,) in db.session.query(City.name).order_by(City.position, City.id)]
+
+
+def all_cities():
+    """Полная матрица цен — только для админки."""
+    return [city_to_dict(city) for city in City.query.order_by(City.position, City.id).all()]
+
+
+def find_city(name):
+    return City.query.filter_by(name=name).first()
+
+
+def validate_city(city):
+    """
+    Проверка одного города; возвращает текст ошибки или None.
+    Стоимость не зависит от общего числа городов.
+    """
+    if not isinstance(city, dict) or not isinstance(city.get("name"), str) or not city["name"].strip():
+        return "Каждый город должен иметь name и products"
+    if not isinstance(city.get("products"), list):
+        return "Товары города должны быть массивом"
+
+    names = set()
+    for product in city["products"]:
+        if not isinstance(product, dict) or "name" not in product or "price" not in product:
+            return "Каждый товар в городе должен иметь name и price"
+        if isinstance(product["price"], bool) or not isinstance(product["price"], (int, float)) or product["price"] < 0:
+            return "Цена товара в городе должна быть положительным числом"
+        if product["name"] in names:
+            return f"Товар «{product['name']}» указан в городе дважды"
+        names.add(product["name"])
+    return None
+
+
+def _apply_prices(city, products):
+    existing = {price.product: price for price in city.prices}
+    prices = []
+    for position, item in enumerate(products):
+        price = existing.get(str(item["name"])) or CityProductPrice(product=str(item["name"]))
+        price.price = float(item["price"])
+        price.position = position
+        prices.append(price)
+    city.prices = prices
+
+
+def upsert_city(name, products, new_name=None):
+    """
+    Создаёт или обновляет один город (строки city и city_product_price).
+    new_name — переименование существующего города. Коммит — на вызывающем.
+    Возвращает City.
+    """
+    city = find_city(name)
+    if city is None:
+        position = db.session.query(func.coalesce(func.max(City.position) + 1, 0)).scalar()
+        city = City(name=name, position=position)
+        db.session.add(city)
+    if new_name:
+        city.name = new_name
+    _apply_prices(city, products)
+    return city
+
+
+def replace_cities(cities):
+    """Сохраняет весь список городов (старый PUT настроек калькулятора)."""
+    names = {item["name"] for item in cities}
+    existing = {}
+    for city in City.query.all():
+        if city.name in names:
+            existing[city.name] = city
+        else:
+            db.session.delete(city)
+    # Удаления раньше вставок, чтобы не упереться в уникальность имени
+    db.session.flush()
+
+    for position, item in enumerate(cities):
+        city = existing.get(item["name"])
+        if city is None:
+            city = City(name=item["name"])
+            db.session.add(city)
+        city.position = position
+        _apply_prices(city, item["products"])
+
+
+def migrate_json_cities():
+    """
+    Разовая миграция: переносит CalculatorSettings.cities (JSON) в таблицы
+    city/city_product_price. Некорректные записи и повторы пропускаются.
+    """
+    if City.query.first() is not None:
+        return
+    settings = CalculatorSettings.query.first()
+    if settings is None:
+        return
+    try:
+        raw_cities = json.loads(settings.cities or "[]")
+    except Exception:
+        raw_cities = []
+
+    cities = {}
+    for city in raw_cities if isinstance(raw_cities, list) else []:
+        if not isinstance(city, dict) or not city.get("name") or city["name"] in cities:
+            continue
+        products = {}
+        for product in city.get("products") or []:
+            if (
+                isinstance(product, dict)
+                and "name" in product
+                and isinstance(product.get("price"), (int, float))
+                and str(product["name"]) not in products
+            ):
+                products[str(product["name"])] = product
+        cities[city["name"]] = {"name": city["name"], "products": list(products.values())}
+    replace_cities(list(cities.values()))
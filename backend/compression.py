@@ -0,0 +1,93 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Мелкие ответы не сжимаем: выигрыш меньше накладных расходов
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = ("application/json",)
+
+
+def available_encodings():
+    if brotli is not None:
+        return ("br", "gzip")
+    return ("gzip",)
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Выбирает кодировку по заголовку Accept-Encoding (request.accept_encodings).
+    При равном q предпочитает brotli. None — отдавать без сжатия.
+    """
+    best, best_quality = None, 0
+    for coding in available_encodings():
+        quality = accept_encodings[coding]
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body, coding, fast=False):
+    """
+    fast=True — для ответов, которые сжимаются на каждом запросе:
+    степень сжатия чуть хуже, зато в разы меньше CPU.
+    """
+    if coding == "br":
+        return brotli.compress(body, quality=4 if fast else 9)
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=5 if fast else 9, mtime=0)
+    return body
+
+
+class EncodedBody:
+    """
+    Готовое тело ответа и его сжатые варианты. Каждый вариант сжимается
+    один раз при первом запросе и дальше отдаётся из памяти.
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.variants = {None: body}
+
+    def get(self, coding):
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            coding = None
+        variant = self.variants.get(coding)
+        if variant is None:
+            variant = compress(self.body, coding)
+            self.variants[coding] = variant
+        return coding, variant
+
+
+def compress_response(response, accept_encodings):
+    """
+    after_request-обработчик: сжимает JSON-ответы больше MIN_COMPRESS_SIZE.
+    Ответы из кэша контента приходят уже сжатыми (Content-Encoding
+    выставлен) и пропускаются, поэтому одни и те же байты не пережимаются.
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    coding = negotiate_encoding(accept_encodings)
+    if coding is None:
+        return response
+
+    response.set_data(compress(body, coding, fast=True))
+    response.headers["Content-Encoding"] = coding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{coding}", weak=weak)
+    return response
@@ -0,0 +1,225 @@
+import re
+
+from images import image_sources
+from models import (
+    Link,
+    WorkCard,
+    PageContent,
+    PromotionsPage,
+    UploadedFile,
+)
+from cities import city_names, find_city
+from products import PROMOTIONS_PAGE, list_products
+from resize import resized_sources
+from site_settings import (
+    DEFAULT_CONTACT_US_BUTTON_LINK,
+    DEFAULT_INTRO_BACKGROUND_PATH,
+    DEFAULT_INTRO_BACKGROUND_TYPE,
+    DEFAULT_INTRO_BUTTON_LINK,
+    site_settings,
+)
+
+# Страницы с текстом и товарами (PageContent.page_type)
+PAGE_TYPES = ("shipments", "wholesale")
+DEFAULT_WAREHOUSE_PRICE = 4225.0
+BLOB_URL_RE = re.compile(r"^/uploads/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$")
+DEFAULT_CALCULATOR_CITIES = [
+    {
+        "name": "Москва",
+        "products": [
+            {"name": "Яблоки", "price": 900},
+            {"name": "Груши", "price": 900},
+            {"name": "Апельсины", "price": 900}
+        ]
+    }
+]
+
+
+def serialize_link(link):
+    return {
+        'id': link.id,
+        'text': link.text,
+        'url': link.url,
+        'icon': link.icon,
+        'order': link.order
+    }
+
+
+def serialize_work_card(card):
+    return {
+        'id': card.id,
+        'title': card.title,
+        'icon': card.icon,
+        'text': card.text,
+        'link': card.link,
+        'order': card.order
+    }
+
+
+def intro_background_payload(background_path, background_type):
+    if not background_path:
+        return {
+            'background_path': DEFAULT_INTRO_BACKGROUND_PATH,
+            'background_type': DEFAULT_INTRO_BACKGROUND_TYPE
+        }
+    return {
+        'background_path': background_path,
+        'background_type': background_type
+    }
+
+
+def city_content(name):
+    """
+    Товары одного города для выпадающего списка калькулятора (без цен)
+    или None, если города нет.
+    """
+    city = find_city(name)
+    if city is None:
+        return None
+    return {
+        'success': True,
+        'city': {'name': city.name, 'products': [{'name': price.product} for price in city.prices]},
+    }
+
+
+def _blob_sha(url):
+    match = BLOB_URL_RE.match(url or "")
+    return match.group(1) if match else None
+
+
+def image_info_map(urls):
+    """
+    Размеры и srcset для загруженных картинок одним запросом:
+    {sha256: {"width", "height", "sources"}}. Старые загрузки вне blobs/
+    и картинки без производных копий в ответ не попадают.
+    """
+    shas = {sha for sha in map(_blob_sha, urls) if sha}
+    if not shas:
+        return {}
+    records = UploadedFile.query.filter(
+        UploadedFile.sha256.in_(shas),
+        UploadedFile.variants.isnot(None),
+    ).all()
+    return {record.sha256: image_sources(record) for record in records}
+
+
+def _with_images(products, extra_urls=()):
+    images = image_info_map([product.get('image_path') for product in products] + list(extra_urls))
+    for product in products:
+        image = images.get(_blob_sha(product.get('image_path'))) or resized_sources(product.get('image_path'))
+        if image:
+            product['image'] = image
+    return images
+
+
+def page_content(page_type):
+    page = PageContent.query.filter_by(page_type=page_type).first()
+    if not page:
+        return {
+            "success": True,
+            "top_text": "",
+            "bottom_text": "",
+            "products": [],
+        }
+
+    products = list_products(page_type)
+    _with_images(products)
+    return {
+        "success": True,
+        "top_text": page.top_text or "",
+        "bottom_text": page.bottom_text or "",
+        "products": products,
+    }
+
+
+def promotions_content():
+    page = PromotionsPage.query.first()
+    if not page:
+        return {
+            "success": True,
+            "text": "",
+            "image_path": "",
+            "products": [],
+        }
+
+    products = list_products(PROMOTIONS_PAGE)
+    images = _with_images(products, extra_urls=[page.image_path])
+    payload = {
+        "success": True,
+        "text": page.text or "",
+        "image_path": page.image_path or "",
+        "products": products,
+    }
+    image = images.get(_blob_sha(page.image_path)) or resized_sources(page.image_path)
+    if image:
+        payload["image"] = image
+    return payload
+
+
+def home_content():
+    """
+    Собирает все секции главной страницы за один проход.
+    Одиночные настройки (иконка, ссылки кнопок, фон) берутся из снимка
+    site_settings(), плюс по одному запросу на ссылки, карточки работы
+    и список городов калькулятора. Цены калькулятора наружу не отдаются:
+    доход считает /api/calculator/quote (pricing.py).
+    """
+    singletons = site_settings()
+
+    links_list = Link.query.order_by(Link.order).all()
+    cards_list = WorkCard.query.order_by(WorkCard.order).all()
+
+    return {
+        'site_icon': singletons['site_icon_path'],
+        'links': [serialize_link(link) for link in links_list],
+        'intro_button_link': singletons['intro_button_link'] or DEFAULT_INTRO_BUTTON_LINK,
+        'intro_background': intro_background_payload(
+            singletons['intro_background_path'],
+            singletons['intro_background_type'],
+        ),
+        'contact_us_button_link': singletons['contact_us_button_link'] or DEFAULT_CONTACT_US_BUTTON_LINK,
+        'work_cards': [serialize_work_card(card) for card in cards_list],
+        'calculator_settings': {'cities': city_names()},
+    }
+
+
+def _contact_links(links, contact_us_button_link):
+    """
+    Контакты для хуков useOperatorLink/useBotSalesLink. Отдельных настроек
+    под них нет, поэтому берём ссылки из блока «Ссылки»: Telegram-ссылку с
+    «бот»/«bot» в названии — как бота продаж, первую другую — как оператора.
+    """
+    operator_telegram = None
+    bot_sales = None
+    for link in links:
+        url = link['url'] or ''
+        if 't.me/' not in url and 'telegram' not in link['text'].lower():
+            continue
+        name = link['text'].lower()
+        if bot_sales is None and ('бот' in name or 'bot' in name):
+            bot_sales = url
+        elif operator_telegram is None:
+            operator_telegram = url
+
+    return {
+        'operator_telegram': operator_telegram or contact_us_button_link,
+        'bot_sales': bot_sales or operator_telegram or contact_us_button_link,
+    }
+
+
+def settings_content(home):
+    """
+    Публичные настройки сайта для GlobalStore. Только несекретные поля:
+    токены OpenAI и Umami сюда не попадают.
+    """
+    extra = site_settings()
+
+    return {
+        'success': True,
+        'site_icon': home['site_icon'],
+        'intro_button_link': home['intro_button_link'],
+        'contact_us_button_link': home['contact_us_button_link'],
+        'umami_website_id': extra['umami_website_id'] or '',
+        'chatbot_enabled': bool(extra['chatbot_openai_token']),
+        'contact_links': _contact_links(home['links'], home['contact_us_button_link']),
+    }
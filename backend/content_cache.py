@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+
+from compression import EncodedBody, available_encodings, negotiate_encoding
+from database import immediate_writes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_CACHE_ENTRIES = 256
+
+_lock = threading.Lock()
+_version_state = {"stat": None, "version": None, "mtime": None}
+_cache = {}
+_change_listeners = []
+
+
+def _version_file():
+    return current_app.config["CONTENT_VERSION_FILE"]
+
+
+def _write_version(path):
+    """
+    Записывает новую версию контента через временный файл и os.replace,
+    чтобы другие воркеры никогда не прочитали файл наполовину.
+    """
+    version = uuid.uuid4().hex
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+def _read_version(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _write_version(path)
+        st = os.stat(path)
+
+    stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _version_state["stat"] == stat_key:
+        return _version_state["version"]
+
+    with open(path) as f:
+        version = f.read().strip()
+    with _lock:
+        if _version_state["version"] != version:
+            _cache.clear()
+        _version_state["stat"] = stat_key
+        _version_state["version"] = version
+        _version_state["mtime"] = int(st.st_mtime)
+    return version
+
+
+def current_content_version():
+    """
+    Текущая глобальная версия контента. Хранится в файле в data/, поэтому
+    одинакова для всех воркеров gunicorn; в рамках запроса читается один раз.
+    """
+    version = g.get("_content_version") if has_app_context() else None
+    if version is None:
+        version = _read_version(_version_file())
+        if has_app_context():
+            g._content_version = version
+    return version
+
+
+def content_last_modified():
+    current_content_version()
+    return datetime.fromtimestamp(_version_state["mtime"] or 0, tz=timezone.utc)
+
+
+def on_content_changed(listener):
+    """Регистрирует функцию, вызываемую после каждого изменения контента."""
+    _change_listeners.append(listener)
+    return listener
+
+
+def bump_content_version():
+    version = _write_version(_version_file())
+    with _lock:
+        _cache.clear()
+        _version_state["stat"] = None
+        _version_state["version"] = None
+    g.pop("_content_version", None)
+    for listener in _change_listeners:
+        listener()
+    return version
+
+
+def cached_content(key, builder):
+    """
+    Возвращает значение из кэша, если оно собрано для текущей версии
+    контента, иначе вызывает builder() и запоминает результат.
+    Значения общие для всех запросов — изменять их нельзя.
+    """
+    version = current_content_version()
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = builder()
+    with _lock:
+        if len(_cache) >= MAX_CACHE_ENTRIES:
+            _cache.clear()
+        _cache[key] = (version, value)
+    return value
+
+
+def dumps_json(data):
+    """JSON в UTF-8 байтах: orjson, если установлен, иначе стандартный json."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response_cached(key, builder):
+    """
+    JSON-ответ из кэша готовых байтов: тело кодируется один раз на версию
+    контента, сжатые gzip/brotli варианты — один раз на кодировку.
+    """
+    body = cached_content(("json", key), lambda: EncodedBody(dumps_json(builder())))
+    coding, data = body.get(negotiate_encoding(request.accept_encodings))
+
+    response = current_app.response_class(data, mimetype="application/json")
+    if coding:
+        response.headers["Content-Encoding"] = coding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def invalidates_content(f):
+    """
+    Декоратор для админских обработчиков, меняющих публичный контент:
+    обработчик пишет в БД под BEGIN IMMEDIATE (database.immediate_writes),
+    после успешного ответа на не-GET запрос поднимается версия контента.
+    """
+    handler = immediate_writes(f)
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = current_app.make_response(handler(*args, **kwargs))
+        if request.method not in ("GET", "HEAD") and response.status_code < 400:
+            bump_content_version()
+        return response
+
+    return decorated_function
+
+
+def conditional_content(f):
+    """
+    Декоратор для публичных эндпоинтов с контентом: выставляет ETag и
+    Last-Modified по версии контента. Если у клиента уже актуальная
+    версия, отвечает 304 до вызова обработчика — без обращения к БД.
+    Сжатые варианты получают свой сильный ETag с суффиксом кодировки.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        version = current_content_version()
+        etag = version
+        last_modified = content_last_modified()
+
+        if request.if_none_match:
+            not_modified = False
+            for candidate in (version, *(f"{version}-{coding}" for coding in available_encodings())):
+                if request.if_none_match.contains(candidate):
+                    etag, not_modified = candidate, True
+                    break
+        else:
+            not_modified = (
+                request.if_modified_since is not None
+                and last_modified <= request.if_modified_since
+            )
+
+        if not_modified:
+            response = current_app.response_class(status=304)
+            response.vary.add("Accept-Encoding")
+        else:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            coding = response.headers.get("Content-Encoding")
+            if coding:
+                etag = f"{version}-{coding}"
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+
+    return decorated_function
@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Соединения дешёвые, но каждое держит свой page cache (SQLITE_CACHE_MB):
+# в процессе одновременно работают поток запроса, JOB_WORKERS и checkpoint
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+POOL_TIMEOUT = 10
+JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+# Повторы BEGIN IMMEDIATE, если блокировку не дали даже за busy_timeout
+BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.2
+# Флаг в session.info: транзакции сессии открываются через BEGIN IMMEDIATE
+IMMEDIATE_KEY = "immediate_writes"
+
+_checkpointer = {"pid": None}
+_checkpointer_lock = threading.Lock()
+
+
+def configure_database(app, path):
+    """Строка подключения и параметры пула; вызывается до db.init_app."""
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+    }
+
+
+def _pragmas(config):
+    return (
+        ("busy_timeout", config["SQLITE_BUSY_TIMEOUT_MS"]),
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("mmap_size", config["SQLITE_MMAP_MB"] * 1024 * 1024),
+        # Отрицательное значение — размер в КиБ, а не в страницах
+        ("cache_size", -config["SQLITE_CACHE_MB"] * 1024),
+        ("temp_store", "MEMORY"),
+        ("journal_size_limit", JOURNAL_SIZE_LIMIT),
+    )
+
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                row = cursor.execute(f"PRAGMA {name}={value}").fetchone()
+                if name == "journal_mode" and row and row[0].lower() != "wal":
+                    # Например, БД на сетевой ФС: WAL там не работает
+                    logger.warning("SQLite journal_mode is %s, not WAL", row[0])
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def is_busy_error(error):
+    message = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def _begin_immediate(session, transaction, connection):
+    """
+    after_begin сессии: в режиме записи транзакция открывается через
+    BEGIN IMMEDIATE. Ожидание блокировки — busy_timeout; если не хватило
+    и его, BEGIN повторяется с нарастающей паузой.
+    """
+    if not session.info.get(IMMEDIATE_KEY) or connection.dialect.name != "sqlite":
+        return
+    delay = BUSY_BACKOFF
+    for attempt in range(BUSY_RETRIES):
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as e:
+            if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                raise
+            logger.warning("SQLite busy, retrying BEGIN IMMEDIATE in %.1fs", delay)
+            time.sleep(delay)
+            delay *= 2
+
+
+@contextmanager
+def write_mode():
+    """
+    Внутри блока все транзакции сессии открываются через BEGIN IMMEDIATE —
+    блокировка записи берётся на первом же запросе к БД. Обработчик может
+    сначала читать, а потом писать: транзакция не повышается с чтения до
+    записи и не падает с "database is locked", пока пишет другой воркер.
+    Незакоммиченное на выходе откатывается, чтобы блокировка не пережила
+    блок (например, не держалась, пока собираются снимки контента).
+    """
+    nested = db.session.info.get(IMMEDIATE_KEY, False)
+    db.session.info[IMMEDIATE_KEY] = True
+    try:
+        yield
+    finally:
+        if not nested:
+            db.session.rollback()
+            db.session.info.pop(IMMEDIATE_KEY, None)
+
+
+def immediate_writes(f):
+    """Декоратор админских обработчиков: не-GET запросы идут в write_mode."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return f(*args, **kwargs)
+        with write_mode():
+            return f(*args, **kwargs)
+
+    return decorated_function
+
+
+@contextmanager
+def write_transaction():
+    """
+    Транзакция записи с BEGIN IMMEDIATE: блокировка записи берётся сразу,
+    поэтому прочитанное внутри никто не изменит до коммита (проверка и
+    вставка без гонок между воркерами). На выходе — коммит при успехе,
+    откат при исключении. Незакоммиченные изменения сессии перед входом
+    откатываются; внутри write_mode транзакция уже IMMEDIATE и продолжается.
+    """
+    nested = db.session.info.get(IMMEDIATE_KEY, False)
+    if not nested:
+        db.session.rollback()
+        db.session.info[IMMEDIATE_KEY] = True
+    try:
+        db.session.connection()
+        yield
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if not nested:
+            db.session.info.pop(IMMEDIATE_KEY, None)
+
+
+def _checkpoint_loop(app, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                with db.engine.connect() as connection:
+                    busy, frames, checkpointed = connection.exec_driver_sql(
+                        "PRAGMA wal_checkpoint(PASSIVE)"
+                    ).one()
+            if busy or checkpointed < frames:
+                logger.info("WAL checkpoint incomplete: %s of %s frames", checkpointed, frames)
+        except Exception as e:
+            logger.warning("WAL checkpoint failed: %s", e)
+
+
+def start_checkpointer(app):
+    """
+    Периодический PASSIVE checkpoint в текущем процессе (после fork —
+    заново). PASSIVE не ждёт читателей и не блокирует писателей, поэтому
+    не мешает запросам; автоматический checkpoint SQLite при этом остаётся.
+    """
+    interval = app.config["SQLITE_CHECKPOINT_SECONDS"]
+    if interval <= 0 or _checkpointer["pid"] == os.getpid():
+        return
+    with _checkpointer_lock:
+        if _checkpointer["pid"] == os.getpid():
+            return
+        thread = threading.Thread(target=_checkpoint_loop, args=(app, interval), name="wal-checkpoint", daemon=True)
+        thread.start()
+        _checkpointer["pid"] = os.getpid()
+
+
+def init_database(app):
+    """
+    После db.init_app: PRAGMA на каждое новое соединение (WAL — читатели не
+    ждут писателя, busy_timeout — писатели ждут друг друга, а не падают с
+    "database is locked") и BEGIN IMMEDIATE для транзакций в режиме записи.
+    Фоновый checkpoint запускается отдельно, в процессе воркера
+    (start_checkpointer).
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+    event.listen(engine, "connect", _apply_pragmas(_pragmas(app.config)))
+    if not event.contains(Session, "after_begin", _begin_immediate):
+        event.listen(Session, "after_begin", _begin_immediate)
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import mimetypes
+import os
+
+from flask import current_app, redirect, request
+from werkzeug.security import safe_join
+
+from content import home_content
+from content_cache import cached_content
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+APPLE_TOUCH_SIZE = 180
+RASTER_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+
+
+def icon_variant_paths(source_path):
+    """Пути производных иконок рядом с загруженным файлом."""
+    stem = os.path.splitext(source_path)[0]
+    return {
+        "favicon.ico": f"{stem}.ico",
+        "apple-touch-icon.png": f"{stem}-{APPLE_TOUCH_SIZE}.png",
+    }
+
+
+def generate_icon_variants(source_path):
+    """
+    Один раз при загрузке готовит .ico (16/32/48) и PNG 180×180 для
+    apple-touch-icon. Без Pillow или для SVG/ICO ничего не делает —
+    тогда отдаётся исходный файл.
+    """
+    ext = source_path.rsplit(".", 1)[-1].lower()
+    if Image is None or ext not in RASTER_EXTENSIONS:
+        return {}
+
+    paths = icon_variant_paths(source_path)
+    try:
+        with Image.open(source_path) as image:
+            image = image.convert("RGBA")
+            image.save(paths["favicon.ico"], format="ICO", sizes=ICO_SIZES)
+            touch = image.copy()
+            touch.thumbnail((APPLE_TOUCH_SIZE, APPLE_TOUCH_SIZE))
+            touch.save(paths["apple-touch-icon.png"], format="PNG", optimize=True)
+    except Exception as e:
+        logger.warning("Cannot generate icon variants for %s: %s", source_path, e)
+        return {}
+    return paths
+
+
+def _load_icon(name):
+    """
+    Иконка для /favicon.ico или /apple-touch-icon.png: байты, тип и ETag.
+    Собирается один раз на версию контента, поэтому путь к иконке читается из БД
+    только после изменения иконки в админке.
+    """
+    icon_path = cached_content("home", home_content)["site_icon"]
+    if not icon_path:
+        return None
+    if not icon_path.startswith("/uploads/"):
+        return {"redirect": icon_path}
+
+    source = safe_join(current_app.config["UPLOADS_DIR"], icon_path[len("/uploads/"):])
+    if source is None:
+        return None
+    candidates = [icon_variant_paths(source)[name]]
+    if name == "favicon.ico":
+        candidates.append(source)
+
+    for path in candidates:
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                body = f.read()
+            return {
+                "body": body,
+                "mimetype": mimetypes.guess_type(path)[0] or "application/octet-stream",
+                "etag": hashlib.sha256(body).hexdigest()[:32],
+            }
+    return None
+
+
+def site_icon_response(name):
+    """Ответ с иконкой сайта из памяти или None, если кастомной иконки нет."""
+    icon = cached_content(("icon", name), lambda: _load_icon(name))
+    if icon is None:
+        return None
+    if "redirect" in icon:
+        return redirect(icon["redirect"])
+
+    response = current_app.response_class(icon["body"], mimetype=icon["mimetype"])
+    response.set_etag(icon["etag"])
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["FAVICON_MAX_AGE"]
+    return response.make_conditional(request)
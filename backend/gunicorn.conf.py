@@ -0,0 +1,10 @@
+# Настройки gunicorn (читается автоматически из рабочего каталога).
+# Число воркеров — WEB_CONCURRENCY, см. Dockerfile
+
+
+def post_worker_init(worker):
+    # Вызывается в каждом воркере после загрузки приложения (и с --preload):
+    # потоки, созданные в мастере, после fork не живут
+    from app import start_background_workers
+
+    start_background_workers()
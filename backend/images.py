@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+
+from models import db
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+# Ширины производных изображений; больше исходной не увеличиваем
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+RASTER_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+FORMAT_MIMETYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def avif_supported():
+    if Image is None:
+        return False
+    try:
+        return bool(features.check("avif"))
+    except Exception:
+        pass
+    try:
+        import pillow_avif  # noqa: F401 — регистрирует AVIF в старых Pillow
+        return True
+    except ImportError:
+        return False
+
+
+def _target_widths(width):
+    # Стандартные ширины меньше исходной плюс сама исходная (не больше
+    # максимальной); set — чтобы широкий исходник не дал 1920 дважды
+    widths = {w for w in DERIVATIVE_WIDTHS if w < width}
+    widths.add(min(width, DERIVATIVE_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def generate_derivatives(record, source_path):
+    """
+    Для растрового изображения сохраняет уменьшенные копии в WebP (и AVIF,
+    если Pillow его умеет) рядом с исходником: <sha256>-<ширина>w.<формат>.
+    Размеры исходника и список копий записываются в UploadedFile, откуда
+    публичный API собирает srcset. Возвращает True, если запись изменилась.
+    """
+    if Image is None or record.ext not in RASTER_EXTENSIONS:
+        return False
+
+    formats = ["webp"] + (["avif"] if avif_supported() else [])
+    stem = os.path.splitext(source_path)[0]
+    url_stem = os.path.splitext(record.url)[0]
+    variants = []
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+        width, height = image.size
+
+        for target_width in _target_widths(width):
+            if target_width == width:
+                resized = image
+            else:
+                target_height = max(1, round(height * target_width / width))
+                resized = image.resize((target_width, target_height), Image.LANCZOS)
+
+            for fmt in formats:
+                path = f"{stem}-{target_width}w.{fmt}"
+                if not os.path.exists(path):
+                    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    quality = AVIF_QUALITY if fmt == "avif" else WEBP_QUALITY
+                    resized.save(tmp_path, format=fmt.upper(), quality=quality)
+                    os.replace(tmp_path, path)
+                variants.append({
+                    "format": fmt,
+                    "width": target_width,
+                    "url": f"{url_stem}-{target_width}w.{fmt}",
+                })
+
+    record.width = width
+    record.height = height
+    record.variants = json.dumps(variants)
+    db.session.commit()
+    return True
+
+
+def image_sources(record):
+    """
+    Описание картинки для фронтенда: собственные размеры и srcset по
+    форматам (AVIF первым — браузер возьмёт первый поддерживаемый).
+    """
+    try:
+        variants = json.loads(record.variants) if record.variants else []
+    except Exception:
+        variants = []
+
+    sources = []
+    for fmt in ("avif", "webp"):
+        srcset = ", ".join(
+            f"{variant['url']} {variant['width']}w"
+            for variant in variants
+            if variant.get("format") == fmt
+        )
+        if srcset:
+            sources.append({"type": FORMAT_MIMETYPES[fmt], "srcset": srcset})
+
+    return {
+        "width": record.width,
+        "height": record.height,
+        "sources": sources,
+    }
@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from content_cache import bump_content_version
+from database import write_transaction
+from favicon import generate_icon_variants
+from images import RASTER_EXTENSIONS, generate_derivatives
+from models import db, Job, UploadedFile
+from mp4_faststart import FaststartError, faststart
+from site_settings import replace_setting_if
+from uploads import store_local_file, temp_upload_path, upload_path
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+# Задача в статусе running дольше этого срока считается брошенной
+# (процесс перезапустили посреди обработки) и берётся заново
+STALE_AFTER = timedelta(minutes=15)
+POLL_INTERVAL = 5
+FASTSTART_EXTENSIONS = {"mp4", "mov"}
+
+_handlers = {}
+_wakeup = threading.Event()
+_workers = {"pid": None, "threads": []}
+_workers_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """Регистрирует обработчик задачи: handler(payload) -> dict | None."""
+    def decorator(f):
+        _handlers[kind] = f
+        return f
+
+    return decorator
+
+
+def job_to_dict(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def enqueue(kind, **payload):
+    """
+    Ставит задачу в очередь (таблица job в SQLite, переживает рестарт).
+    Такая же задача, ещё не выполненная, повторно не создаётся: проверка и
+    вставка идут под блокировкой записи, так что дубль не появится и при
+    одновременной загрузке в двух воркерах. Возвращает Job.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    payload_json = json.dumps(payload, sort_keys=True)
+    with write_transaction():
+        job = Job.query.filter(
+            Job.kind == kind,
+            Job.payload == payload_json,
+            Job.status.in_(("pending", "running")),
+        ).first()
+        if job is None:
+            job = Job(kind=kind, payload=payload_json, status="pending")
+            db.session.add(job)
+
+    if current_app.config.get("JOB_WORKERS", 1) <= 0:
+        # Без фоновых потоков (CLI, отладка) — выполняем сразу
+        _run_job(job.id)
+        db.session.refresh(job)
+    else:
+        start_workers(current_app._get_current_object())
+        _wakeup.set()
+    return job
+
+
+def _fail_abandoned(stale_before):
+    """
+    Брошенные задачи без оставшихся попыток помечаются failed, иначе
+    они навсегда остались бы в статусе running. Сначала дешёвый SELECT:
+    на пустой очереди опрос не берёт блокировку записи и не пишет в WAL.
+    """
+    abandoned = Job.query.filter(
+        Job.status == "running",
+        Job.started_at < stale_before,
+        Job.attempts >= MAX_ATTEMPTS,
+    )
+    if not db.session.query(abandoned.exists()).scalar():
+        return
+
+    # Условие повторяется в UPDATE: задачу мог уже закрыть другой процесс
+    failed = abandoned.update(
+        {
+            "status": "failed",
+            "error": "Worker stopped during the last attempt",
+            "finished_at": datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if failed:
+        logger.warning("Marked %s abandoned job(s) as failed", failed)
+
+
+def _claim_next():
+    """
+    Атомарно забирает следующую задачу: UPDATE с условием по статусу,
+    поэтому одну задачу не возьмут два потока или два процесса.
+    """
+    stale_before = datetime.utcnow() - STALE_AFTER
+    _fail_abandoned(stale_before)
+    candidates = (
+        db.session.query(Job.id)
+        .filter(
+            Job.attempts < MAX_ATTEMPTS,
+            or_(
+                Job.status == "pending",
+                and_(Job.status == "running", Job.started_at < stale_before),
+            ),
+        )
+        .order_by(Job.id)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            Job.query.filter(
+                Job.id == job_id,
+                or_(
+                    Job.status == "pending",
+                    and_(Job.status == "running", Job.started_at < stale_before),
+                ),
+            )
+            .update(
+                {
+                    "status": "running",
+                    "started_at": datetime.utcnow(),
+                    "attempts": Job.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        if claimed:
+            return job_id
+    return None
+
+
+def _run_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job.status != "running":
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        job.attempts += 1
+        db.session.commit()
+
+    try:
+        result = _handlers[job.kind](json.loads(job.payload or "{}"))
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.error = str(e)[:1000]
+        job.status = "pending" if job.attempts < MAX_ATTEMPTS else "failed"
+        job.finished_at = datetime.utcnow() if job.status == "failed" else None
+        db.session.commit()
+        logger.warning("Job %s (%s) attempt %s failed: %s", job.id, job.kind, job.attempts, e)
+        return
+
+    job = db.session.get(Job, job_id)
+    job.status = "done"
+    job.error = None
+    job.result = json.dumps(result) if result is not None else None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _worker_loop(app):
+    while True:
+        try:
+            with app.app_context():
+                job_id = _claim_next()
+                if job_id is not None:
+                    _run_job(job_id)
+                    continue
+        except Exception as e:
+            logger.exception("Job worker error: %s", e)
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(app):
+    """
+    Запускает JOB_WORKERS фоновых потоков в текущем процессе (один раз;
+    после fork в gunicorn — заново). Потоки — демоны: незавершённая задача
+    останется running и будет подхвачена после STALE_AFTER.
+    """
+    count = app.config.get("JOB_WORKERS", 1)
+    if count <= 0 or _workers["pid"] == os.getpid():
+        return
+    with _workers_lock:
+        if _workers["pid"] == os.getpid():
+            return
+        threads = []
+        for index in range(count):
+            thread = threading.Thread(target=_worker_loop, args=(app,), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        _workers["threads"] = threads
+        _workers["pid"] = os.getpid()
+
+
+def enqueue_upload_jobs(record, extra_kinds=()):
+    """
+    Задачи обработки для только что загруженного файла: копии для srcset
+    всем растровым картинкам плюс специфичные для эндпоинта (extra_kinds).
+    Возвращает список Job.
+    """
+    kinds = []
+    if record.ext in RASTER_EXTENSIONS and record.variants is None:
+        kinds.append("image_derivatives")
+    for kind in extra_kinds:
+        if kind == "video_faststart" and record.ext not in FASTSTART_EXTENSIONS:
+            continue
+        kinds.append(kind)
+    return [enqueue(kind, upload_id=record.id) for kind in kinds]
+
+
+def _upload_record(payload):
+    record = db.session.get(UploadedFile, payload["upload_id"])
+    if record is None:
+        raise ValueError(f"UploadedFile {payload['upload_id']} not found")
+    return record
+
+
+@job_handler("image_derivatives")
+def _image_derivatives(payload):
+    """WebP/AVIF копии для srcset; до готовности API отдаёт исходник."""
+    record = _upload_record(payload)
+    if record.variants is None and generate_derivatives(record, upload_path(record.relative_path)):
+        bump_content_version()
+    return {"variants": len(json.loads(record.variants or "[]"))}
+
+
+@job_handler("site_icon_variants")
+def _site_icon_variants(payload):
+    record = _upload_record(payload)
+    paths = generate_icon_variants(upload_path(record.relative_path))
+    if paths:
+        # favicon кэшируется по версии контента
+        bump_content_version()
+    return {"variants": sorted(paths)}
+
+
+@job_handler("video_faststart")
+def _video_faststart(payload):
+    """
+    Переносит moov в начало mp4/mov. Файлы в blobs/ неизменяемы, поэтому
+    результат сохраняется новым blob'ом, а фон первой секции переключается
+    на него, только если всё ещё указывает на исходный файл.
+    """
+    record = _upload_record(payload)
+    tmp_path = temp_upload_path(record.ext)
+    try:
+        shutil.copyfile(upload_path(record.relative_path), tmp_path)
+        try:
+            if not faststart(tmp_path):
+                return {"url": record.url, "changed": False}
+        except FaststartError as e:
+            # Структура файла не поддерживается — повторять бессмысленно
+            logger.warning("Faststart skipped for %s: %s", record.relative_path, e)
+            return {"url": record.url, "changed": False, "skipped": str(e)}
+
+        old_url = record.url
+        new_record, _ = store_local_file(tmp_path, record.ext, record.original_name)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    updated = replace_setting_if("intro_background_path", old_url, new_record.url)
+    db.session.commit()
+    if updated:
+        bump_content_version()
+    return {"url": new_record.url, "changed": True}
@@ -0,0 +1,124 @@
+import mimetypes
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+
+from offload import send_offloaded
+
+# Размер куска при отдаче: крупные куски — меньше итераций и системных вызовов
+CHUNK_SIZE = 512 * 1024
+# Сколько видео держать отображёнными в память (горячее — фон первой секции)
+MAX_MAPPED_FILES = 4
+
+_lock = threading.Lock()
+_mapped = OrderedDict()
+
+
+def _media_etag(st):
+    # Загрузки не перезаписываются на месте, поэтому (mtime, size) однозначно
+    # определяют содержимое и годятся для сильного ETag
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def _get_mapping(path, st):
+    """
+    mmap файла, общий для всех запросов. Страницы читаются из page cache ОС,
+    так что повторная отдача горячего видео не трогает диск и не копирует
+    файл целиком. Вытесненные отображения закрываются сборщиком мусора,
+    когда их перестанут читать текущие ответы.
+    """
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _lock:
+        mapping = _mapped.get(key)
+        if mapping is not None:
+            _mapped.move_to_end(key)
+            return mapping
+
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with _lock:
+        _mapped[key] = mapping
+        while len(_mapped) > MAX_MAPPED_FILES:
+            _mapped.popitem(last=False)
+    return mapping
+
+
+def _iter_range(mapping, start, stop):
+    for offset in range(start, stop, CHUNK_SIZE):
+        yield mapping[offset:min(offset + CHUNK_SIZE, stop)]
+
+
+def _requested_range(etag, size):
+    """
+    (start, stop) для Range-запроса, None — отдать файл целиком,
+    False — диапазон невыполним (416). If-Range с устаревшим ETag или
+    датой отменяет Range, как требует RFC 9110.
+    """
+    byte_range = request.range
+    if byte_range is None or byte_range.units != "bytes" or len(byte_range.ranges) != 1:
+        return None
+
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != etag:
+        return None
+    if if_range.date is not None:
+        return None
+
+    bounds = byte_range.range_for_length(size)
+    return bounds if bounds is not None else False
+
+
+def send_media(root, filename, prefix):
+    """
+    Отдаёт видео из загрузок: сильный ETag, долгий кэш, Range/If-Range для
+    перемотки. Тело читается кусками из mmap; при FILE_OFFLOAD файл
+    отдаёт прокси.
+    """
+    path = safe_join(root, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    st = os.stat(path)
+    etag = _media_etag(st)
+
+    if current_app.config["FILE_OFFLOAD"]:
+        response = send_offloaded(path, root, prefix, etag=etag, conditional=True)
+    elif request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = _range_response(path, st, etag)
+
+    response.set_etag(etag)
+    response.last_modified = st.st_mtime
+    response.accept_ranges = "bytes"
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["MEDIA_MAX_AGE"]
+    return response
+
+
+def _range_response(path, st, etag):
+    size = st.st_size
+    bounds = _requested_range(etag, size)
+    if bounds is False:
+        response = current_app.response_class(status=416)
+        response.headers["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, stop = bounds or (0, size)
+    body = _iter_range(_get_mapping(path, st), start, stop) if size else []
+    response = current_app.response_class(
+        body,
+        status=206 if bounds else 200,
+        mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+        direct_passthrough=True,
+    )
+    response.content_length = stop - start
+    if bounds:
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    return response
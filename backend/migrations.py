@@ -0,0 +1,178 @@
+import json
+import logging
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import func, inspect, text
+
+from cities import migrate_json_cities
+from models import (
+    db,
+    City,
+    CityProductPrice,
+    Job,
+    Product,
+    ProductPrice,
+    SchemaVersion,
+    SiteSetting,
+    UploadedFile,
+)
+from products import PROMOTIONS_PAGE, normalize_products, replace_products
+from seeding import seed_defaults
+from site_settings import migrate_singleton_settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _file_lock(path):
+    """Межпроцессная блокировка, чтобы миграции выполнял только один воркер."""
+    with open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _create_tables():
+    db.create_all()
+
+
+def _add_calculator_price_columns():
+    columns = {column["name"] for column in inspect(db.engine).get_columns("calculator_settings")}
+    for col, default in [
+        ("chemist_kg_price", 120000.0),
+        ("carrier_with_weight_price_per_step", 100000.0),
+        ("carrier_without_weight_price_per_step", 2000.0),
+    ]:
+        if col not in columns:
+            db.session.execute(text(f"ALTER TABLE calculator_settings ADD COLUMN {col} REAL DEFAULT {default}"))
+    db.session.commit()
+
+
+def _legacy_products(table, key_column):
+    """
+    Строки (ключ, JSON) из старой колонки products. В моделях её больше нет:
+    товары лежат в таблице product, колонка читается только миграциями.
+    """
+    tables = inspect(db.engine)
+    if not tables.has_table(table):
+        return []
+    if "products" not in {column["name"] for column in tables.get_columns(table)}:
+        return []
+    return db.session.execute(text(f"SELECT {key_column}, products FROM {table} ORDER BY id")).all()
+
+
+def _load_json_products(raw):
+    try:
+        products = json.loads(raw) if raw else []
+    except Exception:
+        products = []
+    return products if isinstance(products, list) else []
+
+
+def _normalize_stored_products():
+    """Переписывает колонку products в канонический вид (старые сохранения)."""
+    for table in ("page_content", "promotions_page"):
+        for row_id, raw in _legacy_products(table, "id"):
+            if not raw:
+                continue
+            canonical = json.dumps(normalize_products(_load_json_products(raw)), ensure_ascii=False)
+            if canonical != raw:
+                db.session.execute(
+                    text(f"UPDATE {table} SET products = :products WHERE id = :id"),
+                    {"products": canonical, "id": row_id},
+                )
+    db.session.commit()
+
+
+def _create_uploaded_files():
+    UploadedFile.__table__.create(db.engine, checkfirst=True)
+
+
+def _add_image_dimension_columns():
+    columns = {column["name"] for column in inspect(db.engine).get_columns("uploaded_file")}
+    for col, col_type in [("width", "INTEGER"), ("height", "INTEGER"), ("variants", "TEXT")]:
+        if col not in columns:
+            db.session.execute(text(f"ALTER TABLE uploaded_file ADD COLUMN {col} {col_type}"))
+    db.session.commit()
+
+
+def _create_jobs():
+    Job.__table__.create(db.engine, checkfirst=True)
+
+
+def _create_products():
+    Product.__table__.create(db.engine, checkfirst=True)
+    ProductPrice.__table__.create(db.engine, checkfirst=True)
+    # Товары из JSON-колонок переносятся в product/product_price; страницы,
+    # у которых строки уже есть, пропускаются, сами колонки не трогаются
+    sources = list(_legacy_products("page_content", "page_type"))
+    sources += [(PROMOTIONS_PAGE, raw) for _, raw in _legacy_products("promotions_page", "id")[:1]]
+    for page, raw in sources:
+        if not raw or Product.query.filter_by(page=page).first() is not None:
+            continue
+        replace_products(page, _load_json_products(raw))
+    db.session.commit()
+
+
+def _create_cities():
+    City.__table__.create(db.engine, checkfirst=True)
+    CityProductPrice.__table__.create(db.engine, checkfirst=True)
+    migrate_json_cities()
+    db.session.commit()
+
+
+def _create_site_settings():
+    # Старые таблицы site_icon, intro_button_link и т.п. не удаляются,
+    # чтобы можно было откатиться на предыдущую версию
+    SiteSetting.__table__.create(db.engine, checkfirst=True)
+    migrate_singleton_settings()
+    db.session.commit()
+
+
+# Порядок менять нельзя: номер миграции записывается в schema_version
+MIGRATIONS = [
+    (1, _create_tables),
+    (2, _add_calculator_price_columns),
+    (3, _normalize_stored_products),
+    (4, _create_uploaded_files),
+    (5, _add_image_dimension_columns),
+    (6, _create_jobs),
+    (7, _create_products),
+    (8, _create_cities),
+    (9, _create_site_settings),
+]
+
+
+def current_schema_version():
+    return db.session.query(func.max(SchemaVersion.version)).scalar() or 0
+
+
+def run_migrations():
+    """
+    Применяет недостающие миграции и заполняет значения по умолчанию.
+    Вызывается один раз при старте процесса (или командой `flask migrate`),
+    а не на каждом запросе.
+    """
+    with _file_lock(current_app.config["MIGRATION_LOCK_FILE"]):
+        SchemaVersion.__table__.create(db.engine, checkfirst=True)
+        applied = current_schema_version()
+
+        for version, migration in MIGRATIONS:
+            if version <= applied:
+                continue
+            logger.info("Applying migration %s: %s", version, migration.__name__)
+            migration()
+            db.session.add(SchemaVersion(version=version, name=migration.__name__.lstrip("_")))
+            db.session.commit()
+
+        seed_defaults()
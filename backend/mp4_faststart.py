@@ -0,0 +1,132 @@
+import os
+import struct
+
+COPY_CHUNK_SIZE = 1024 * 1024
+# Атомы внутри moov, в которых лежат таблицы смещений чанков
+CONTAINER_ATOMS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf"}
+
+
+class FaststartError(Exception):
+    pass
+
+
+def _read_atoms(f, file_size):
+    """Список атомов верхнего уровня: (тип, начало, размер)."""
+    atoms = []
+    offset = 0
+    while offset < file_size:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            raise FaststartError("Обрезанный заголовок атома")
+        size, kind = struct.unpack(">I4s", header)
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0:
+            size = file_size - offset
+        if size < 8 or offset + size > file_size:
+            raise FaststartError(f"Некорректный размер атома {kind!r}")
+        atoms.append((kind, offset, size))
+        offset += size
+    return atoms
+
+
+def _patch_chunk_offsets(moov, shift, insert_at, moov_start):
+    """
+    Сдвигает смещения в stco/co64 на размер moov для данных, которые
+    окажутся после вставленного moov. Работает по месту в bytearray.
+    """
+    def walk(start, end):
+        offset = start
+        while offset + 8 <= end:
+            size, kind = struct.unpack_from(">I4s", moov, offset)
+            header_size = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", moov, offset + 8)[0]
+                header_size = 16
+            elif size == 0:
+                size = end - offset
+            if size < header_size or offset + size > end:
+                raise FaststartError(f"Некорректный атом {kind!r} внутри moov")
+
+            if kind == b"cmov":
+                raise FaststartError("Сжатый moov (cmov) не поддерживается")
+            if kind in CONTAINER_ATOMS:
+                walk(offset + header_size, offset + size)
+            elif kind in (b"stco", b"co64"):
+                _patch_table(offset + header_size, offset + size, kind == b"co64")
+            offset += size
+
+    def _patch_table(start, end, wide):
+        count = struct.unpack_from(">I", moov, start + 4)[0]
+        fmt, width = (">Q", 8) if wide else (">I", 4)
+        table = start + 8
+        if table + count * width > end:
+            raise FaststartError("Таблица смещений выходит за пределы атома")
+        for index in range(count):
+            position = table + index * width
+            value = struct.unpack_from(fmt, moov, position)[0]
+            if insert_at <= value < moov_start:
+                value += shift
+                if not wide and value > 0xFFFFFFFF:
+                    raise FaststartError("Смещение не помещается в stco")
+                struct.pack_into(fmt, moov, position, value)
+
+    walk(8, len(moov))
+
+
+def _copy_range(src, dst, start, length):
+    src.seek(start)
+    remaining = length
+    while remaining:
+        chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise FaststartError("Файл оказался короче ожидаемого")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def faststart(path):
+    """
+    Переносит атом moov перед mdat, чтобы браузер начал воспроизведение
+    после загрузки первых сотен КБ, а не всего файла. Файл копируется
+    потоково кусками по COPY_CHUNK_SIZE, в памяти держится только moov.
+    Возвращает True, если файл переписан; False — если moov уже в начале.
+    При неподдерживаемой структуре бросает FaststartError, файл не трогается.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as src:
+        atoms = _read_atoms(src, file_size)
+        kinds = [kind for kind, _, _ in atoms]
+        if kinds.count(b"moov") != 1 or b"mdat" not in kinds:
+            raise FaststartError("Ожидается ровно один moov и хотя бы один mdat")
+
+        moov_index = kinds.index(b"moov")
+        mdat_index = kinds.index(b"mdat")
+        if moov_index < mdat_index:
+            return False
+
+        _, moov_start, moov_size = atoms[moov_index]
+        insert_at = atoms[mdat_index][1]
+
+        src.seek(moov_start)
+        moov = bytearray(src.read(moov_size))
+        if moov_size > 0xFFFFFFFF or struct.unpack_from(">I", moov, 0)[0] == 1:
+            raise FaststartError("64-битный размер moov не поддерживается")
+        _patch_chunk_offsets(moov, moov_size, insert_at, moov_start)
+
+        tmp_path = f"{path}.{os.getpid()}.faststart"
+        try:
+            with open(tmp_path, "wb") as dst:
+                for index, (kind, start, size) in enumerate(atoms):
+                    if index == mdat_index:
+                        dst.write(moov)
+                    if index != moov_index:
+                        _copy_range(src, dst, start, size)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return True
+
@@ -0,0 +1,64 @@
+import mimetypes
+import os
+import zlib
+from urllib.parse import quote
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+# "" — файлы отдаёт сам Flask, "x-accel" — nginx по X-Accel-Redirect,
+# "x-sendfile" — Apache/lighttpd по X-Sendfile (USE_X_SENDFILE во Flask)
+OFFLOAD_MODES = ("", "x-accel", "x-sendfile")
+
+
+def init_offload(app):
+    mode = app.config["FILE_OFFLOAD"]
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"FILE_OFFLOAD must be one of {OFFLOAD_MODES}, got {mode!r}")
+    app.config["USE_X_SENDFILE"] = mode == "x-sendfile"
+
+
+def send_offloaded(path, root, prefix, mimetype=None, etag=True, last_modified=None, conditional=True, **kwargs):
+    """
+    Отдаёт уже найденный и проверенный файл. В режиме x-accel тело не
+    читается: nginx получает внутренний путь prefix + путь относительно root
+    и сам отдаёт файл (с Range и без участия воркера). ETag, Last-Modified
+    и ответ 304 при этом те же, что у send_file. В остальных режимах —
+    обычный send_file, который при USE_X_SENDFILE ставит X-Sendfile.
+    """
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if current_app.config["FILE_OFFLOAD"] != "x-accel":
+        return send_file(
+            path,
+            mimetype=mimetype,
+            etag=etag,
+            last_modified=last_modified,
+            conditional=conditional,
+            **kwargs,
+        )
+
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(relative)
+
+    st = os.stat(path)
+    if etag is True:
+        # Тот же вид, что у werkzeug send_file
+        etag = f"{st.st_mtime}-{st.st_size}-{zlib.adler32(path.encode()) & 0xFFFFFFFF}"
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = last_modified or st.st_mtime
+    if conditional:
+        response.make_conditional(request)
+        if response.status_code == 304:
+            # 304 отдаём сами: иначе nginx выполнил бы редирект и вернул тело
+            del response.headers["X-Accel-Redirect"]
+    return response
+
+
+def send_from_root(root, filename, prefix, **kwargs):
+    """Аналог send_from_directory с поддержкой разгрузки на прокси."""
+    path = safe_join(root, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return send_offloaded(path, root, prefix, **kwargs)
@@ -0,0 +1,240 @@
+import math
+import threading
+
+from cities import plain_number
+from content_cache import cached_content, current_content_version
+from models import CalculatorSettings, City
+
+# Единственное место расчёта дохода: Calculator.jsx только показывает
+# результат /api/calculator/quote. Диапазоны — как у ползунков
+DEFAULT_PRODUCT_PRICE = 900
+POSITIONS = ("courier", "chemist", "transporter")
+MAX_TARGET_MONTHLY = 10 ** 9
+LIMITS = {
+    "days": (1, 30, 6),
+    "deposits": (1, 100, 6),
+    "chemist_kg": (1, 50, 10),
+    "carrier_with_weight_per_day": (100, 2000, 100),
+    "carrier_without_weight_per_day": (0, 2000, 0),
+}
+# Для пустой таблицы и колонок, добавленных миграцией 2 (nullable)
+DEFAULT_SETTINGS = {
+    "weeks_per_month": 4.33,
+    "packing_bonus": 1100.0,
+    "chemist_kg_price": 120000.0,
+    "carrier_with_weight_price_per_step": 100000.0,
+    "carrier_without_weight_price_per_step": 2000.0,
+}
+MAX_BATCH = 200
+MAX_MEMO_ENTRIES = 4096
+
+_memo_lock = threading.Lock()
+_memo = {"version": None, "results": {}}
+
+
+class QuoteError(ValueError):
+    """Некорректный запрос расчёта — текст уходит клиенту с кодом 400."""
+
+
+def _round(value):
+    # Math.round из JS: половина округляется вверх, а не к чётному
+    return int(math.floor(value + 0.5))
+
+
+def _settings(row):
+    # Сравнение с None, а не "or": заданный админом 0 — тоже значение
+    settings = dict(DEFAULT_SETTINGS)
+    if row is not None:
+        for name in DEFAULT_SETTINGS:
+            value = getattr(row, name)
+            if value is not None:
+                settings[name] = value
+    return settings
+
+
+def _load_pricing():
+    settings = _settings(CalculatorSettings.query.first())
+    prices = {}
+    for city in City.query.all():
+        prices[city.name] = [(price.product, price.price) for price in city.prices]
+    return {**settings, "prices": prices}
+
+
+def pricing_snapshot():
+    """Настройки и матрица цен, собранные один раз на версию контента."""
+    return cached_content("pricing", _load_pricing)
+
+
+def _int_param(params, name):
+    low, high, default = LIMITS[name]
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise QuoteError(f"{name} должно быть целым числом")
+    if not low <= value <= high:
+        raise QuoteError(f"{name} должно быть от {low} до {high}")
+    return value
+
+
+def _flag(params, name):
+    value = params.get(name, False)
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def normalize_quote_request(params):
+    """Приводит запрос к кортежу-ключу: он же ключ мемоизации."""
+    if not isinstance(params, dict):
+        raise QuoteError("Запрос расчёта должен быть объектом")
+    position = params.get("position", "courier")
+    if position not in POSITIONS:
+        raise QuoteError(f"position должно быть одним из: {', '.join(POSITIONS)}")
+
+    if position == "chemist":
+        return (position, _int_param(params, "chemist_kg"))
+    if position == "transporter":
+        return (
+            position,
+            _int_param(params, "carrier_with_weight_per_day"),
+            _int_param(params, "carrier_without_weight_per_day"),
+        )
+
+    days = _int_param(params, "days")
+    deposits = _int_param(params, "deposits")
+    packing = _flag(params, "packing_by_self")
+    return (position, str(params.get("city") or ""), str(params.get("product") or ""), days, deposits, packing)
+
+
+def _clamp(name, value):
+    low, high, _ = LIMITS[name]
+    return min(high, max(low, value))
+
+
+def _courier_price(pricing, city, product, packing):
+    price = _product_price(pricing, city, product)
+    return price + pricing["packing_bonus"] if packing else price
+
+
+def _solve_target(pricing, key, target):
+    """
+    Подбирает значения ползунков под желаемый месячный доход (кнопки
+    «Или выберите желаемый доход»). Возвращает новый ключ расчёта.
+    """
+    position = key[0]
+    if position == "chemist":
+        kg_price = pricing["chemist_kg_price"]
+        kg = _round(target / kg_price) if kg_price > 0 else LIMITS["chemist_kg"][1]
+        return (position, _clamp("chemist_kg", kg))
+
+    if position == "transporter":
+        _, with_weight, without_weight = key
+        with_price = pricing["carrier_with_weight_price_per_step"]
+        without_price = pricing["carrier_without_weight_price_per_step"]
+        current_with = max(0, (with_weight - 100) / 10 + 1) * with_price
+        if target <= current_with:
+            steps = max(0, math.floor(target / with_price)) if with_price > 0 else 0
+            return (position, _clamp("carrier_with_weight_per_day", 100 + (steps - 1) * 10), 0)
+        steps = math.floor((target - current_with) / without_price) if without_price > 0 else 0
+        return (position, with_weight, _clamp("carrier_without_weight_per_day", steps * 10))
+
+    _, city, product, days, deposits, packing = key
+    price = _courier_price(pricing, city, product, packing)
+    max_days, max_deposits = LIMITS["days"][1], LIMITS["deposits"][1]
+    if price <= 0 or target >= price * max_deposits * max_days:
+        return (position, city, product, max_days, max_deposits, packing)
+    deposits = math.ceil(target / (price * max_days))
+    return (position, city, product, max_days, _clamp("deposits", deposits), packing)
+
+
+def _target(params):
+    value = params.get("target_monthly")
+    if value is None or value == "":
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise QuoteError("target_monthly должно быть целым числом")
+    if not 0 < value <= MAX_TARGET_MONTHLY:
+        raise QuoteError(f"target_monthly должно быть от 1 до {MAX_TARGET_MONTHLY}")
+    return value
+
+
+def _product_price(pricing, city, product):
+    products = pricing["prices"].get(city) or []
+    for name, price in products:
+        if name == product:
+            return price
+    return products[0][1] if products else DEFAULT_PRODUCT_PRICE
+
+
+def _compute(pricing, key):
+    position = key[0]
+    if position == "chemist":
+        monthly = _round(key[1] * pricing["chemist_kg_price"])
+        inputs = {"chemist_kg": key[1]}
+    elif position == "transporter":
+        with_weight_steps = (key[1] - 100) / 10 + 1
+        without_weight_steps = key[2] / 10
+        monthly = _round(
+            with_weight_steps * pricing["carrier_with_weight_price_per_step"]
+            + without_weight_steps * pricing["carrier_without_weight_price_per_step"]
+        )
+        inputs = {"carrier_with_weight_per_day": key[1], "carrier_without_weight_per_day": key[2]}
+    else:
+        _, city, product, days, deposits, packing = key
+        monthly = _courier_price(pricing, city, product, packing) * deposits * days
+        inputs = {"city": city, "product": product, "days": days, "deposits": deposits, "packing_by_self": packing}
+
+    # inputs — значения, по которым посчитано (после подбора под target_monthly)
+    return {
+        "position": position,
+        "monthly": plain_number(monthly),
+        "weekly": _round(monthly / pricing["weeks_per_month"]),
+        "inputs": inputs,
+    }
+
+
+def quote_many(requests):
+    """
+    Расчёт пачки запросов на одном снимке настроек. С target_monthly
+    значения ползунков сначала подбираются под желаемый доход. Результаты
+    запоминаются до следующего изменения контента, поэтому повторные
+    и типовые расчёты (пресеты, значения по умолчанию) не считаются заново.
+    """
+    if len(requests) > MAX_BATCH:
+        raise QuoteError(f"Не больше {MAX_BATCH} расчётов за запрос")
+
+    pricing = None
+    keys = []
+    for index, params in enumerate(requests):
+        try:
+            key = normalize_quote_request(params)
+            target = _target(params)
+        except QuoteError as e:
+            raise QuoteError(f"Расчёт #{index}: {e}") if len(requests) > 1 else e
+        if target is not None:
+            pricing = pricing or pricing_snapshot()
+            key = _solve_target(pricing, key, target)
+        keys.append(key)
+
+    version = current_content_version()
+    with _memo_lock:
+        if _memo["version"] != version:
+            _memo["version"] = version
+            _memo["results"] = {}
+        results = _memo["results"]
+
+    quotes = []
+    for key in keys:
+        quote = results.get(key)
+        if quote is None:
+            pricing = pricing or pricing_snapshot()
+            quote = _compute(pricing, key)
+            with _memo_lock:
+                if len(results) >= MAX_MEMO_ENTRIES:
+                    results.clear()
+                results[key] = quote
+        quotes.append(quote)
+    return quotes
@@ -0,0 +1,147 @@
+from sqlalchemy import func
+
+from models import db, Product, ProductPrice
+
+# Ключ страницы «Акции» в product.page (у остальных — page_type)
+PROMOTIONS_PAGE = "promotions"
+
+
+def normalize_products(raw_products):
+    """
+    Приводит список товаров к каноническому виду: только словари,
+    у каждого есть уникальный id, name, description, image_path и список prices.
+    Вызывается при записи, чтобы чтение не повторяло эту работу.
+    """
+    if not isinstance(raw_products, list):
+        return []
+
+    next_id = max(
+        (item["id"] for item in raw_products if isinstance(item, dict) and isinstance(item.get("id"), int)),
+        default=0,
+    ) + 1
+
+    seen_ids = set()
+    normalized_products = []
+    for item in raw_products:
+        if not isinstance(item, dict):
+            continue
+        product_id = item.get("id")
+        if not isinstance(product_id, (int, str)) or product_id in seen_ids:
+            product_id = next_id
+            next_id += 1
+        seen_ids.add(product_id)
+        name = item.get("name", "")
+        description = item.get("description", "")
+        image_path = item.get("image_path", "")
+        prices = item.get("prices")
+        # Обратная совместимость для старого формата с одиночным полем price
+        if not isinstance(prices, list):
+            single_price = item.get("price")
+            if single_price is not None and single_price != "":
+                prices = [{"weight": "", "price": str(single_price)}]
+            else:
+                prices = []
+
+        normalized_products.append(
+            {
+                "id": product_id,
+                "name": name,
+                "description": description,
+                "image_path": image_path,
+                "prices": prices,
+            }
+        )
+    return normalized_products
+
+
+def product_to_dict(product):
+    """Тот же вид, что раньше лежал в JSON-колонке products."""
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "image_path": product.image_path,
+        "prices": [{"weight": price.weight, "price": price.price} for price in product.prices],
+    }
+
+
+def list_products(page):
+    """Товары страницы по порядку: два запроса (товары + цены через selectin)."""
+    products = Product.query.filter_by(page=page).order_by(Product.position, Product.id).all()
+    return [product_to_dict(product) for product in products]
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _apply(product, item):
+    """Переносит нормализованный словарь товара в строку; цены пересоздаются, только если изменились."""
+    product.name = _text(item["name"])
+    product.description = _text(item["description"])
+    product.image_path = _text(item["image_path"])
+
+    prices = [
+        (_text(price.get("weight")), _text(price.get("price")))
+        for price in item["prices"]
+        if isinstance(price, dict)
+    ]
+    if [(price.weight, price.price) for price in product.prices] != prices:
+        product.prices = [
+            ProductPrice(position=position, weight=weight, price=price)
+            for position, (weight, price) in enumerate(prices)
+        ]
+
+
+def replace_products(page, raw_products):
+    """
+    Сохраняет список товаров страницы целиком (PUT страницы из админки).
+    Строки сопоставляются по id: изменённые обновляются, новые
+    добавляются, отсутствующие в списке удаляются. Коммит — на вызывающем.
+    """
+    existing = {product.id: product for product in Product.query.filter_by(page=page).all()}
+    for position, item in enumerate(normalize_products(raw_products)):
+        product = existing.pop(item["id"], None)
+        if product is None:
+            product = Product(page=page)
+            db.session.add(product)
+        product.position = position
+        _apply(product, item)
+
+    for product in existing.values():
+        db.session.delete(product)
+
+
+def add_product(page, data):
+    """Добавляет товар в конец списка страницы."""
+    position = (
+        db.session.query(func.coalesce(func.max(Product.position) + 1, 0))
+        .filter(Product.page == page)
+        .scalar()
+    )
+    product = Product(page=page, position=position)
+    _apply(product, normalize_products([data])[0])
+    db.session.add(product)
+    return product
+
+
+def product_at(page, position):
+    """Товар по номеру в списке — так его адресуют URL админки (индекс page, position)."""
+    return Product.query.filter_by(page=page, position=position).order_by(Product.id).first()
+
+
+def update_product(product, data):
+    """Меняет только переданные поля; одиночное price заменяет список цен."""
+    item = {**product_to_dict(product), **data}
+    if "price" in data and "prices" not in data:
+        item.pop("prices")
+    _apply(product, normalize_products([item])[0])
+
+
+def delete_product(product):
+    """Удаляет товар и сдвигает следующие, чтобы номера остались подряд."""
+    db.session.delete(product)
+    Product.query.filter(
+        Product.page == product.page,
+        Product.position > product.position,
+    ).update({Product.position: Product.position - 1}, synchronize_session=False)
@@ -0,0 +1,256 @@
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import quote
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+
+from images import AVIF_QUALITY, DERIVATIVE_WIDTHS, FORMAT_MIMETYPES, RASTER_EXTENSIONS, WEBP_QUALITY, avif_supported
+from offload import send_offloaded
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Кэш лежит внутри uploads, чтобы в режиме x-accel его отдавал тот же
+# внутренний location, что и сами загрузки
+CACHE_SUBDIR = "cache"
+JPEG_QUALITY = 82
+SAVE_OPTIONS = {
+    "jpeg": {"quality": JPEG_QUALITY, "optimize": True},
+    "webp": {"quality": WEBP_QUALITY},
+    "avif": {"quality": AVIF_QUALITY},
+    "png": {"optimize": True},
+}
+EXIF_ORIENTATION = 0x0112
+# Время доступа обновляется не чаще раза в минуту — для LRU этого хватает
+TOUCH_INTERVAL = 60
+# После очистки кэш занимает не больше этой доли лимита
+EVICT_TO = 0.8
+
+_lock = threading.Lock()
+_key_locks = {}
+_source_sizes = {}
+# Столько исходников держим в памяти с известными размерами
+MAX_SOURCE_SIZES = 1024
+
+
+def resize_formats():
+    formats = {"webp", "jpeg", "png"}
+    if avif_supported():
+        formats.add("avif")
+    return formats
+
+
+def _cache_root():
+    return os.path.join(current_app.config["UPLOADS_DIR"], CACHE_SUBDIR)
+
+
+def _cache_relative(filename, st, width, fmt):
+    """Ключ зависит от версии исходника, поэтому заменённый файл не отдаётся из кэша."""
+    key = hashlib.sha256(f"{filename}\0{st.st_mtime_ns}\0{st.st_size}\0{width}\0{fmt}".encode()).hexdigest()
+    return f"{key[:2]}/{key}.{fmt}"
+
+
+def _key_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _scan_cache(root):
+    entries = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+    return entries
+
+
+def _enforce_limit(root, keep):
+    """
+    Если кэш на диске больше лимита, удаляет давно не запрошенные файлы
+    (кроме keep — его сейчас отдаём). Размер каждый раз измеряется обходом
+    каталога, а не счётчиком в памяти: кэш общий для всех воркеров, и
+    лимит должен держаться для него целиком. Вызывается только после
+    новой копии, а рендер всё равно дороже обхода.
+    """
+    limit = current_app.config["RESIZE_CACHE_MAX_BYTES"]
+    with _lock:
+        entries = _scan_cache(root)
+        total = sum(size for _, size, _ in entries)
+        if total <= limit:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= limit * EVICT_TO:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _touch(path, st):
+    now = time.time()
+    if now - st.st_atime > TOUCH_INTERVAL:
+        try:
+            # Меняем только atime: mtime остаётся, ETag/Last-Modified стабильны
+            os.utime(path, (now, st.st_mtime))
+        except OSError:
+            pass
+
+
+def _source_size(path, st=None):
+    """
+    (ширина, высота) исходника с учётом EXIF-поворота. Читается только
+    заголовок файла, результат запоминается по mtime и размеру.
+    """
+    st = st or os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    size = _source_sizes.get(key)
+    if size is None:
+        with Image.open(path) as image:
+            width, height = image.size
+            # Ориентации 5-8 — поворот на 90°: ширина и высота меняются местами
+            if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                width, height = height, width
+        size = (width, height)
+        with _lock:
+            if len(_source_sizes) >= MAX_SOURCE_SIZES:
+                _source_sizes.clear()
+            _source_sizes[key] = size
+    return size
+
+
+def _source_widths(source_width):
+    """
+    Ширины копий для исходника: стандартные меньше него плюс одна, не
+    меньшая исходника, — её копия будет исходного размера (не увеличиваем).
+    Пары (запрашиваемая ширина, фактическая ширина копии).
+    """
+    widths = [(w, w) for w in DERIVATIVE_WIDTHS if w < source_width]
+    for w in DERIVATIVE_WIDTHS:
+        if w >= source_width:
+            widths.append((w, source_width))
+            break
+    return widths
+
+
+def _render(source, target, width, fmt):
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if fmt == "jpeg":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            image.save(tmp_path, format=fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def send_resized(uploads_dir, filename, prefix):
+    """
+    /uploads/<path>?w=<ширина>&fmt=<формат> — уменьшенная копия старой
+    загрузки. Ширины ограничены DERIVATIVE_WIDTHS, форматы — resize_formats(),
+    иначе 400: так кэш нельзя раздуть перебором параметров. Первая отдача
+    делает копию в uploads/cache, дальше файл берётся с диска.
+    """
+    if Image is None:
+        abort(404)
+
+    ext = filename.rsplit(".", 1)[-1].lower()
+    if ext not in RASTER_EXTENSIONS:
+        abort(400)
+    try:
+        width = int(request.args.get("w", DERIVATIVE_WIDTHS[-1]))
+    except ValueError:
+        abort(400)
+    fmt = request.args.get("fmt", "jpeg" if ext == "jpg" else ext).lower()
+    if width not in DERIVATIVE_WIDTHS or fmt not in resize_formats():
+        abort(400)
+
+    source = safe_join(uploads_dir, filename)
+    if source is None or not os.path.isfile(source):
+        abort(404)
+
+    st = os.stat(source)
+    try:
+        source_width = _source_size(source, st)[0]
+    except Exception as e:
+        current_app.logger.warning("Cannot read image size of %s: %s", filename, e)
+        abort(415)
+    # Все ширины не меньше исходника дают одну и ту же копию исходного
+    # размера — в кэше она хранится один раз, под наименьшей из них
+    width = min(width, _source_widths(source_width)[-1][0])
+
+    root = _cache_root()
+    relative = _cache_relative(filename, st, width, fmt)
+    target = os.path.join(root, *relative.split("/"))
+
+    try:
+        _touch(target, os.stat(target))
+    except FileNotFoundError:
+        with _key_lock(relative):
+            if not os.path.isfile(target):
+                try:
+                    _render(source, target, width, fmt)
+                except Exception as e:
+                    current_app.logger.warning("Resize failed for %s: %s", filename, e)
+                    abort(415)
+                _enforce_limit(root, target)
+
+    mimetype = FORMAT_MIMETYPES.get(fmt) or f"image/{fmt}"
+    return send_offloaded(target, uploads_dir, prefix, mimetype=mimetype)
+
+
+def resized_sources(url):
+    """
+    srcset через ?w= для картинки без готовых копий (загруженной до
+    появления фоновой обработки). Ширины — только до исходной: больших
+    копий не бывает. Вызывается при сборке кэша контента, поэтому размеры
+    исходника читаются один раз на версию контента.
+    """
+    if Image is None or not url or not url.startswith("/uploads/"):
+        return None
+    if url.startswith(("/uploads/blobs/", f"/uploads/{CACHE_SUBDIR}/")):
+        # У новых загрузок копии делает фоновая задача (jobs.py)
+        return None
+    if url.rsplit(".", 1)[-1].lower() not in RASTER_EXTENSIONS:
+        return None
+
+    path = safe_join(current_app.config["UPLOADS_DIR"], url[len("/uploads/"):])
+    try:
+        width, height = _source_size(path)
+    except Exception:
+        # Файла нет или он не читается — остаётся просто src
+        return None
+
+    base = quote(url)
+    sources = []
+    for fmt in ("avif", "webp"):
+        if fmt in resize_formats():
+            srcset = ", ".join(
+                f"{base}?w={requested}&fmt={fmt} {actual}w"
+                for requested, actual in _source_widths(width)
+            )
+            sources.append({"type": FORMAT_MIMETYPES[fmt], "srcset": srcset})
+    return {"width": width, "height": height, "sources": sources}
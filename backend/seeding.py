@@ -0,0 +1,272 @@
+import json
+
+from sqlalchemy import func, or_, select
+
+from content import DEFAULT_CALCULATOR_CITIES, DEFAULT_WAREHOUSE_PRICE, PAGE_TYPES
+from database import write_transaction
+from models import (
+    db,
+    WorkCard,
+    CalculatorSettings,
+    Link,
+    PageContent,
+    Product,
+    PromotionsPage,
+)
+from cities import replace_cities
+from products import PROMOTIONS_PAGE, replace_products
+
+WORK_CARD_TEXT = "Lorem Ipsum is simply dummy text of the printing and typesetting industry. Lorem Ipsum has been the industry's standard dummy text ever since the 1500s, when an unknown printer took."
+
+SHIPMENTS_TOP_TEXT = "Это тестовый текст для страницы «Отправки». Вы можете изменить его в админке."
+SHIPMENTS_BOTTOM_TEXT = """
+<h2>Условия отправки почтой</h2>
+<p>Отправка товара производится в течение 48 часов после оплаты!</p>
+<p>При каждом заказе берём дополнительно 400 грн за упаковку и отправку.</p>
+<p>Минимальный заказ — 20$.</p>
+<h3>Методы оплаты</h3>
+<p>Оплата картой (10% комиссия)</p>
+<p>USDT, TRON, BTC, LTC — без комиссии.</p>
+""".strip()
+WHOLESALE_TOP_TEXT = "Тестовый верхний текст для страницы «Опт кладами». Измените его в админке."
+WHOLESALE_BOTTOM_TEXT = "Тестовый нижний текст для «Опта кладами». Также редактируется в админке."
+PROMOTIONS_TEXT = "Тестовый текст для страницы «Предзаказы из Европы». Отредактируйте его под свои задачи."
+
+# Товары по умолчанию; сохраняются через products.replace_products
+SHIPMENTS_PRODUCTS = [
+    {
+        "id": 1,
+        "name": "Яблоки (розница)",
+        "description": "Сочные красные яблоки премиального сорта. Идеальны для свежего употребления.",
+        "image_path": "/assets/img/main/1.png",
+        "prices": [
+            {"weight": "0.5 кг", "price": "250 ₽"},
+            {"weight": "1 кг", "price": "450 ₽"},
+        ],
+    },
+    {
+        "id": 2,
+        "name": "Апельсины (розница)",
+        "description": "Спелые апельсины с ярким цитрусовым вкусом и высоким содержанием витамина C.",
+        "image_path": "/assets/img/main/2.png",
+        "prices": [
+            {"weight": "0.5 кг", "price": "270 ₽"},
+            {"weight": "1 кг", "price": "490 ₽"},
+        ],
+    },
+    {
+        "id": 3,
+        "name": "Лимоны (розница)",
+        "description": "Ароматные лимоны для чая, выпечки и домашних лимонадов.",
+        "image_path": "/assets/img/main/3.png",
+        "prices": [
+            {"weight": "0.5 кг", "price": "220 ₽"},
+            {"weight": "1 кг", "price": "400 ₽"},
+        ],
+    },
+]
+
+WHOLESALE_PRODUCTS = [
+    {
+        "id": 1,
+        "name": "Яблоки (опт)",
+        "description": "Крупная оптовая партия яблок для магазинов и HoReCa.",
+        "image_path": "/assets/img/main/1.png",
+        "prices": [
+            {"weight": "5 кг", "price": "1 800 ₽"},
+            {"weight": "10 кг", "price": "3 400 ₽"},
+        ],
+    },
+    {
+        "id": 2,
+        "name": "Апельсины (опт)",
+        "description": "Свежие апельсины в оптовой фасовке для торговых сетей.",
+        "image_path": "/assets/img/main/2.png",
+        "prices": [
+            {"weight": "5 кг", "price": "1 950 ₽"},
+            {"weight": "10 кг", "price": "3 700 ₽"},
+        ],
+    },
+    {
+        "id": 3,
+        "name": "Лимоны (опт)",
+        "description": "Отборные лимоны крупным оптом.",
+        "image_path": "/assets/img/main/3.png",
+        "prices": [
+            {"weight": "5 кг", "price": "1 600 ₽"},
+            {"weight": "10 кг", "price": "3 000 ₽"},
+        ],
+    },
+]
+
+PROMOTIONS_PRODUCTS = [
+    {
+        "id": 1,
+        "name": "Яблоки (акция)",
+        "description": "Специальная цена на сладкие яблоки при заказе от 1 кг.",
+        "image_path": "/assets/img/main/1.png",
+        "prices": [
+            {"weight": "1 кг", "price": "420 ₽"},
+            {"weight": "2 кг", "price": "780 ₽"},
+        ],
+    },
+    {
+        "id": 2,
+        "name": "Апельсины (акция)",
+        "description": "Выгодное предложение на апельсины для свежевыжатого сока.",
+        "image_path": "/assets/img/main/2.png",
+        "prices": [
+            {"weight": "1 кг", "price": "460 ₽"},
+            {"weight": "3 кг", "price": "1 280 ₽"},
+        ],
+    },
+    {
+        "id": 3,
+        "name": "Лимоны (акция)",
+        "description": "Скидка на лимоны при заказе от 2 кг.",
+        "image_path": "/assets/img/main/3.png",
+        "prices": [
+            {"weight": "2 кг", "price": "720 ₽"},
+        ],
+    },
+]
+
+
+def _default_work_cards():
+    return [
+        WorkCard(title="Курьер", icon="/assets/img/icons/courier-ico.svg", text=WORK_CARD_TEXT, link=".", order=0),
+        WorkCard(title="Xимик", icon="/assets/img/icons/chemie-ico.svg", text=WORK_CARD_TEXT, link=".", order=1),
+        WorkCard(title="Склад", icon="/assets/img/icons/sklad-ico.svg", text=WORK_CARD_TEXT, link=".", order=2),
+    ]
+
+
+def _default_links():
+    return [
+        Link(text="Rutor", url="https://example.com", icon="/assets/img/icons/rutor-ico.svg", order=0),
+        Link(text="Telegram", url="https://example.com", icon="/assets/img/icons/telegram-ico.svg", order=1),
+        Link(text="Магазин", url="https://example.com", icon="/assets/img/icons/shop-ico.svg", order=2),
+    ]
+
+
+def _default_calculator_settings():
+    return CalculatorSettings(
+        courier_products=json.dumps([], ensure_ascii=False),
+        cities=json.dumps([], ensure_ascii=False),
+        warehouse_price_per_deposit=DEFAULT_WAREHOUSE_PRICE,
+        warehouse_price_prikop=DEFAULT_WAREHOUSE_PRICE,
+        warehouse_price_magnet=DEFAULT_WAREHOUSE_PRICE,
+        weeks_per_month=4.33,
+        packing_bonus=1100.0,
+        chemist_kg_price=120000.0,
+        carrier_with_weight_price_per_step=100000.0,
+        carrier_without_weight_price_per_step=2000.0,
+    )
+
+
+# Таблица -> фабрика строк по умолчанию, если таблица пуста.
+# Одиночные настройки сайта не сеются: их значения по умолчанию
+# задаёт реестр site_settings.SETTINGS.
+_DEFAULT_ROWS = {
+    "work_card": (WorkCard, _default_work_cards),
+    "calculator_settings": (CalculatorSettings, lambda: [_default_calculator_settings()]),
+    "link": (Link, _default_links),
+    "promotions_page": (PromotionsPage, lambda: [PromotionsPage(
+        text=PROMOTIONS_TEXT,
+        image_path="",
+    )]),
+}
+
+
+_DEFAULT_PRODUCTS = {
+    "shipments": SHIPMENTS_PRODUCTS,
+    "wholesale": WHOLESALE_PRODUCTS,
+    PROMOTIONS_PAGE: PROMOTIONS_PRODUCTS,
+}
+
+
+def _count(model, *criteria):
+    return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+
+def _empty(column):
+    # Как прежнее "if not page.top_text": пустым считается только None и ""
+    return or_(column.is_(None), column == "")
+
+
+def _missing_defaults():
+    """
+    Одним SELECT со скалярными подзапросами выясняет, чего не хватает:
+    пустые таблицы, отсутствующие страницы, страницы без текста и без товаров.
+    """
+    columns = [_count(model).label(name) for name, (model, _) in _DEFAULT_ROWS.items()]
+    for page_type in PAGE_TYPES:
+        is_page = PageContent.page_type == page_type
+        columns += [
+            _count(PageContent, is_page).label(f"{page_type}_page"),
+            _count(PageContent, is_page, _empty(PageContent.top_text)).label(f"{page_type}_no_top_text"),
+            _count(PageContent, is_page, _empty(PageContent.bottom_text)).label(f"{page_type}_no_bottom_text"),
+        ]
+    for page in _DEFAULT_PRODUCTS:
+        columns.append(_count(Product, Product.page == page).label(f"{page}_products"))
+
+    row = db.session.execute(select(*columns)).one()._asdict()
+    missing = set()
+    for name, value in row.items():
+        # Для таблиц, страниц и товаров не хватает строк, для флагов «no_*» — данных
+        is_count = name in _DEFAULT_ROWS or name.endswith(("_page", "_products"))
+        if (value == 0) if is_count else value:
+            missing.add(name)
+    return missing
+
+
+def _apply_defaults(missing):
+    for name, (_, factory) in _DEFAULT_ROWS.items():
+        if name in missing:
+            db.session.add_all(factory())
+
+    pages = {
+        "shipments": (SHIPMENTS_TOP_TEXT, SHIPMENTS_BOTTOM_TEXT),
+        "wholesale": (WHOLESALE_TOP_TEXT, WHOLESALE_BOTTOM_TEXT),
+    }
+    for page_type, (top_text, bottom_text) in pages.items():
+        if f"{page_type}_page" in missing:
+            db.session.add(PageContent(
+                page_type=page_type,
+                top_text=top_text,
+                bottom_text=bottom_text,
+            ))
+            continue
+
+        # Тексты по умолчанию исторически подставляются только для «Отправок»
+        if page_type == "shipments" and missing & {"shipments_no_top_text", "shipments_no_bottom_text"}:
+            page = PageContent.query.filter_by(page_type=page_type).first()
+            if "shipments_no_top_text" in missing:
+                page.top_text = top_text
+            if "shipments_no_bottom_text" in missing:
+                page.bottom_text = bottom_text
+
+    for page, products in _DEFAULT_PRODUCTS.items():
+        if f"{page}_products" in missing:
+            replace_products(page, products)
+
+    # Города по умолчанию — только вместе с новыми настройками калькулятора:
+    # если админ удалил все города, они не возвращаются
+    if "calculator_settings" in missing:
+        replace_cities(DEFAULT_CALCULATOR_CITIES)
+
+
+def seed_defaults():
+    """
+    Заполняет контент по умолчанию. Обычный случай — всё уже на месте —
+    стоит одного запроса. Иначе берётся блокировка записи (write_transaction),
+    проверка повторяется внутри неё, и всё недостающее вставляется одной
+    транзакцией, поэтому параллельно стартующие воркеры не задвоят данные.
+    """
+    if not _missing_defaults():
+        db.session.rollback()
+        return
+
+    with write_transaction():
+        missing = _missing_defaults()
+        if missing:
+            _apply_defaults(missing)
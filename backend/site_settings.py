@@ -0,0 +1,116 @@
+import json
+from datetime import datetime
+from types import MappingProxyType
+
+from sqlalchemy import inspect, text
+
+from content_cache import cached_content
+from models import db, SiteSetting
+
+DEFAULT_INTRO_BUTTON_LINK = "#about"
+DEFAULT_CONTACT_US_BUTTON_LINK = "#"
+DEFAULT_INTRO_BACKGROUND_PATH = "/assets/img/main/intro-bg.png"
+DEFAULT_INTRO_BACKGROUND_TYPE = "image"
+DEFAULT_UMAMI_WEBSITE_ID = "6ea99ce5-33ba-4d44-809a-76f429b7e221"
+
+# Ключ -> (тип, значение по умолчанию). Значения хранятся в JSON,
+# тип проверяется при записи; None допустим для любого ключа.
+SETTINGS = {
+    "site_icon_path": (str, None),
+    "intro_button_link": (str, DEFAULT_INTRO_BUTTON_LINK),
+    "contact_us_button_link": (str, DEFAULT_CONTACT_US_BUTTON_LINK),
+    "intro_background_path": (str, DEFAULT_INTRO_BACKGROUND_PATH),
+    "intro_background_type": (str, DEFAULT_INTRO_BACKGROUND_TYPE),
+    "chatbot_openai_token": (str, ""),
+    "chatbot_preset": (str, ""),
+    "umami_api_key": (str, ""),
+    "umami_website_id": (str, DEFAULT_UMAMI_WEBSITE_ID),
+}
+
+
+def _load_settings():
+    values = {key: default for key, (_, default) in SETTINGS.items()}
+    for row in SiteSetting.query.all():
+        if row.key in SETTINGS:
+            try:
+                values[row.key] = json.loads(row.value)
+            except (TypeError, ValueError):
+                pass
+    return MappingProxyType(values)
+
+
+def site_settings():
+    """
+    Все настройки сайта одним запросом, один раз на версию контента.
+    Снимок неизменяемый и общий для всех запросов процесса; запись через
+    save_settings видна после bump_content_version (его делает
+    @invalidates_content или фоновая задача).
+    """
+    return cached_content("site_settings", _load_settings)
+
+
+def _encode(key, value):
+    if key not in SETTINGS:
+        raise KeyError(f"Unknown setting: {key}")
+    value_type = SETTINGS[key][0]
+    if value is not None and not isinstance(value, value_type):
+        raise TypeError(f"Setting {key} must be {value_type.__name__}")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def save_settings(**values):
+    """Записывает настройки (upsert по ключу). Коммит — на вызывающем."""
+    now = datetime.utcnow()
+    for key, value in values.items():
+        db.session.merge(SiteSetting(key=key, value=_encode(key, value), updated_at=now))
+
+
+def replace_setting_if(key, expected, value):
+    """
+    Атомарно меняет значение, только если в БД сейчас expected
+    (например, фоновая задача не перетрёт фон, уже заменённый админом).
+    Возвращает True, если строка обновлена. Коммит — на вызывающем.
+    """
+    updated = SiteSetting.query.filter_by(key=key, value=_encode(key, expected)).update(
+        {"value": _encode(key, value), "updated_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    return bool(updated)
+
+
+# Старые таблицы-одиночки: (таблица, колонка) -> ключ настройки
+_LEGACY_COLUMNS = {
+    ("site_icon", "icon_path"): "site_icon_path",
+    ("intro_button_link", "link"): "intro_button_link",
+    ("contact_us_button_link", "link"): "contact_us_button_link",
+    ("intro_background", "background_path"): "intro_background_path",
+    ("intro_background", "background_type"): "intro_background_type",
+    ("chat_bot_settings", "openai_token"): "chatbot_openai_token",
+    ("chat_bot_settings", "preset"): "chatbot_preset",
+    ("umami_settings", "api_key"): "umami_api_key",
+    ("umami_settings", "website_id"): "umami_website_id",
+}
+
+
+def migrate_singleton_settings():
+    """
+    Разовая миграция: переносит первую строку каждой старой таблицы
+    настроек в site_setting. Уже записанные ключи не перезаписываются,
+    сами таблицы остаются как есть.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    existing_keys = {key for (key,) in db.session.query(SiteSetting.key)}
+    values = {}
+    for table in {table for table, _ in _LEGACY_COLUMNS}:
+        if table not in existing_tables:
+            continue
+        columns = {column: key for (name, column), key in _LEGACY_COLUMNS.items() if name == table}
+        row = db.session.execute(
+            text(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id LIMIT 1")
+        ).mappings().first()
+        if row is None:
+            continue
+        for column, key in columns.items():
+            if key not in existing_keys and row[column] is not None:
+                values[key] = row[column]
+    save_settings(**values)
@@ -0,0 +1,50 @@
+import logging
+import os
+import threading
+
+from flask import current_app
+
+from compression import available_encodings, compress
+from content import home_content, page_content, promotions_content
+from content_cache import dumps_json
+from static_assets import ENCODING_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def _snapshot_payloads():
+    home = home_content()
+    return {
+        "home.json": {**home, "success": True},
+        "calculator.json": home["calculator_settings"],
+        "pages/shipments.json": page_content("shipments"),
+        "pages/wholesale.json": page_content("wholesale"),
+        "promotions.json": promotions_content(),
+    }
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def publish_snapshots():
+    """
+    Выкладывает снимки публичного контента статическими JSON-файлами в
+    SNAPSHOT_DIR (по умолчанию dist/content). Каждый файл пишется во
+    временный и переименовывается, поэтому читатель никогда не увидит
+    его частично. Рядом кладутся .gz/.br варианты для прокси.
+    """
+    snapshot_dir = current_app.config["SNAPSHOT_DIR"]
+    try:
+        for name, payload in _snapshot_payloads().items():
+            path = os.path.join(snapshot_dir, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            body = dumps_json(payload)
+            _write_atomic(path, body)
+            for coding in available_encodings():
+                _write_atomic(path + ENCODING_EXTENSIONS[coding], compress(body, coding))
+    except Exception as e:
+        logger.exception("publish_snapshots failed: %s", e)
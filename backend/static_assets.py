@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import sys
+
+from flask import abort, current_app, request
+
+from compression import MIN_COMPRESS_SIZE, available_encodings, compress, negotiate_encoding
+from offload import send_offloaded
+
+logger = logging.getLogger(__name__)
+
+# Vite кладёт в assets/ файлы вида index-<8 символов хэша>.js: их содержимое
+# никогда не меняется, поэтому кэшируются навсегда
+HASHED_ASSET_RE = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE_MAX_AGE = 31536000
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/wasm",
+    "application/xml",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+)
+ENCODING_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+_manifest = {}
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _is_compressible(mimetype):
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _ensure_variant(path, st, coding):
+    """
+    Возвращает путь к сжатому соседу файла (.gz/.br), создавая его, если он
+    отсутствует или старше исходника. None — если записать его не удалось.
+    """
+    variant_path = path + ENCODING_EXTENSIONS[coding]
+    try:
+        variant_st = os.stat(variant_path)
+        if variant_st.st_mtime_ns >= st.st_mtime_ns:
+            return variant_path
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(path, "rb") as f:
+            data = compress(f.read(), coding)
+        if len(data) >= st.st_size:
+            return None
+        tmp_path = f"{variant_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, variant_path)
+    except OSError as e:
+        logger.warning("Cannot write %s: %s", variant_path, e)
+        return None
+    return variant_path
+
+
+def _asset_entry(root, path):
+    st = os.stat(path)
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    variants = {}
+    if _is_compressible(mimetype) and st.st_size >= MIN_COMPRESS_SIZE:
+        for coding in available_encodings():
+            variant_path = _ensure_variant(path, st, coding)
+            if variant_path:
+                variants[coding] = variant_path
+
+    return relative, {
+        "path": path,
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "etag": _file_hash(path),
+        "mimetype": mimetype,
+        "immutable": bool(HASHED_ASSET_RE.match(relative)),
+        "variants": variants,
+    }
+
+
+def build_manifest(root, exclude=()):
+    """
+    Обходит собранный фронтенд (dist) и запоминает для каждого файла размер,
+    mtime, хэш содержимого и готовые .gz/.br варианты. После этого отдача
+    статики не требует обращений к файловой системе кроме открытия файла.
+    exclude — каталоги, которые обслуживаются отдельно (снимки контента).
+    """
+    manifest = {}
+    excluded = [os.path.abspath(path) for path in exclude]
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [
+            name for name in dirnames
+            if os.path.abspath(os.path.join(dirpath, name)) not in excluded
+        ]
+        for filename in filenames:
+            if filename.endswith((".gz", ".br", ".tmp")):
+                continue
+            relative, entry = _asset_entry(root, os.path.join(dirpath, filename))
+            manifest[relative] = entry
+    return manifest
+
+
+def load_manifest(root, exclude=()):
+    global _manifest
+    if not os.path.isdir(root):
+        _manifest = {}
+        return _manifest
+    _manifest = build_manifest(root, exclude)
+    logger.info("Static manifest: %s files from %s", len(_manifest), root)
+    return _manifest
+
+
+def get_asset(path):
+    return _manifest.get(path)
+
+
+def send_asset(entry):
+    """
+    Отдаёт файл из манифеста: выбирает сжатый вариант по Accept-Encoding,
+    ставит сильный ETag по содержимому и заголовки кэширования.
+    В режиме x-accel nginx всегда получает несжатый файл: заголовок
+    Content-Encoding из ответа с X-Accel-Redirect клиенту не передаётся,
+    поэтому готовый .gz выбирает сам nginx (gzip_static on).
+    """
+    coding = None
+    if entry["variants"] and current_app.config["FILE_OFFLOAD"] != "x-accel":
+        coding = negotiate_encoding(request.accept_encodings)
+    path = entry["variants"][coding] if coding else entry["path"]
+    etag = f"{entry['etag']}-{coding}" if coding else entry["etag"]
+
+    try:
+        response = send_offloaded(
+            path,
+            current_app.static_folder,
+            current_app.config["ACCEL_STATIC_PREFIX"],
+            mimetype=entry["mimetype"],
+            etag=etag,
+            last_modified=entry["mtime"],
+            conditional=True,
+        )
+    except FileNotFoundError:
+        # dist пересобрали без перезапуска сервера
+        abort(404)
+
+    if coding:
+        response.headers["Content-Encoding"] = coding
+    if entry["variants"]:
+        response.vary.add("Accept-Encoding")
+    if entry["immutable"]:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def serve_static_asset(filename):
+    """Замена стандартного static-эндпоинта Flask: отдача только из манифеста."""
+    entry = get_asset(filename)
+    if entry is None:
+        abort(404)
+    return send_asset(entry)
+
+
+def load_app_manifest(app):
+    snapshot_dir = app.config.get("SNAPSHOT_DIR")
+    return load_manifest(app.static_folder, exclude=[snapshot_dir] if snapshot_dir else [])
+
+
+if __name__ == "__main__":
+    # Предварительное сжатие на этапе сборки: python static_assets.py ../dist
+    logging.basicConfig(level=logging.INFO)
+    load_manifest(sys.argv[1] if len(sys.argv) > 1 else "../dist", exclude=[])
@@ -0,0 +1,111 @@
+BEGIN TRANSACTION;
+CREATE TABLE calculator_settings (
+	id INTEGER NOT NULL, 
+	courier_products TEXT NOT NULL, 
+	cities TEXT NOT NULL, 
+	warehouse_price_per_deposit FLOAT NOT NULL, 
+	warehouse_price_prikop FLOAT NOT NULL, 
+	warehouse_price_magnet FLOAT NOT NULL, 
+	weeks_per_month FLOAT NOT NULL, 
+	packing_bonus FLOAT NOT NULL, 
+	chemist_kg_price FLOAT, 
+	carrier_with_weight_price_per_step FLOAT, 
+	carrier_without_weight_price_per_step FLOAT, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "calculator_settings" VALUES(1,'[]','[{"name": "Москва", "products": [{"name": "Яблоки", "price": 900}, {"name": "Груши", "price": 900}, {"name": "Апельсины", "price": 900}]}]',4225.0,4225.0,4225.0,4.33,1100.0,120000.0,100000.0,2000.0);
+CREATE TABLE chat_bot_settings (
+	id INTEGER NOT NULL, 
+	openai_token VARCHAR(500), 
+	preset TEXT, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "chat_bot_settings" VALUES(1,'','');
+CREATE TABLE contact_us_button_link (
+	id INTEGER NOT NULL, 
+	link VARCHAR(500) NOT NULL, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "contact_us_button_link" VALUES(1,'#');
+CREATE TABLE intro_background (
+	id INTEGER NOT NULL, 
+	background_path VARCHAR(500) NOT NULL, 
+	background_type VARCHAR(20) NOT NULL, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "intro_background" VALUES(1,'/assets/img/main/intro-bg.png','image');
+CREATE TABLE intro_button_link (
+	id INTEGER NOT NULL, 
+	link VARCHAR(500) NOT NULL, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "intro_button_link" VALUES(1,'#about');
+CREATE TABLE link (
+	id INTEGER NOT NULL, 
+	text VARCHAR(200) NOT NULL, 
+	url VARCHAR(500) NOT NULL, 
+	icon VARCHAR(500) NOT NULL, 
+	"order" INTEGER NOT NULL, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "link" VALUES(1,'Rutor','https://example.com','/assets/img/icons/rutor-ico.svg',0);
+INSERT INTO "link" VALUES(2,'Telegram','https://example.com','/assets/img/icons/telegram-ico.svg',1);
+INSERT INTO "link" VALUES(3,'Магазин','https://example.com','/assets/img/icons/shop-ico.svg',2);
+CREATE TABLE page_content (
+	id INTEGER NOT NULL, 
+	page_type VARCHAR(50) NOT NULL, 
+	top_text TEXT, 
+	bottom_text TEXT, 
+	products TEXT, 
+	PRIMARY KEY (id), 
+	UNIQUE (page_type)
+);
+INSERT INTO "page_content" VALUES(1,'shipments','Это тестовый текст для страницы «Отправки». Вы можете изменить его в админке.','<h2>Условия отправки почтой</h2>
+<p>Отправка товара производится в течение 48 часов после оплаты!</p>
+<p>При каждом заказе берём дополнительно 400 грн за упаковку и отправку.</p>
+<p>Минимальный заказ — 20$.</p>
+<h3>Методы оплаты</h3>
+<p>Оплата картой (10% комиссия)</p>
+<p>USDT, TRON, BTC, LTC — без комиссии.</p>','[{"id": 1, "name": "Яблоки (розница)", "description": "Сочные красные яблоки премиального сорта. Идеальны для свежего употребления.", "image_path": "/assets/img/main/1.png", "prices": [{"weight": "0.5 кг", "price": "250 ₽"}, {"weight": "1 кг", "price": "450 ₽"}]}, {"id": 2, "name": "Апельсины (розница)", "description": "Спелые апельсины с ярким цитрусовым вкусом и высоким содержанием витамина C.", "image_path": "/assets/img/main/2.png", "prices": [{"weight": "0.5 кг", "price": "270 ₽"}, {"weight": "1 кг", "price": "490 ₽"}]}, {"id": 3, "name": "Лимоны (розница)", "description": "Ароматные лимоны для чая, выпечки и домашних лимонадов.", "image_path": "/assets/img/main/3.png", "prices": [{"weight": "0.5 кг", "price": "220 ₽"}, {"weight": "1 кг", "price": "400 ₽"}]}]');
+INSERT INTO "page_content" VALUES(2,'wholesale','Тестовый верхний текст для страницы «Опт кладами». Измените его в админке.','Тестовый нижний текст для «Опта кладами». Также редактируется в админке.','[{"id": 1, "name": "Яблоки (опт)", "description": "Крупная оптовая партия яблок для магазинов и HoReCa.", "image_path": "/assets/img/main/1.png", "prices": [{"weight": "5 кг", "price": "1 800 ₽"}, {"weight": "10 кг", "price": "3 400 ₽"}]}, {"id": 2, "name": "Апельсины (опт)", "description": "Свежие апельсины в оптовой фасовке для торговых сетей.", "image_path": "/assets/img/main/2.png", "prices": [{"weight": "5 кг", "price": "1 950 ₽"}, {"weight": "10 кг", "price": "3 700 ₽"}]}, {"id": 3, "name": "Лимоны (опт)", "description": "Отборные лимоны крупным оптом.", "image_path": "/assets/img/main/3.png", "prices": [{"weight": "5 кг", "price": "1 600 ₽"}, {"weight": "10 кг", "price": "3 000 ₽"}]}]');
+CREATE TABLE promotions_page (
+	id INTEGER NOT NULL, 
+	text TEXT, 
+	image_path VARCHAR(500), 
+	products TEXT, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "promotions_page" VALUES(1,'Тестовый текст для страницы «Предзаказы из Европы». Отредактируйте его под свои задачи.','','[{"id": 1, "name": "Яблоки (акция)", "description": "Специальная цена на сладкие яблоки при заказе от 1 кг.", "image_path": "/assets/img/main/1.png", "prices": [{"weight": "1 кг", "price": "420 ₽"}, {"weight": "2 кг", "price": "780 ₽"}]}, {"id": 2, "name": "Апельсины (акция)", "description": "Выгодное предложение на апельсины для свежевыжатого сока.", "image_path": "/assets/img/main/2.png", "prices": [{"weight": "1 кг", "price": "460 ₽"}, {"weight": "3 кг", "price": "1 280 ₽"}]}, {"id": 3, "name": "Лимоны (акция)", "description": "Скидка на лимоны при заказе от 2 кг.", "image_path": "/assets/img/main/3.png", "prices": [{"weight": "2 кг", "price": "720 ₽"}]}]');
+CREATE TABLE site_icon (
+	id INTEGER NOT NULL, 
+	icon_path VARCHAR(500) NOT NULL, 
+	PRIMARY KEY (id)
+);
+CREATE TABLE support_request (
+	id INTEGER NOT NULL, 
+	message TEXT NOT NULL, 
+	contact_method VARCHAR(300) NOT NULL, 
+	status VARCHAR(20) NOT NULL, 
+	created_at DATETIME NOT NULL, 
+	PRIMARY KEY (id)
+);
+CREATE TABLE umami_settings (
+	id INTEGER NOT NULL, 
+	api_key VARCHAR(500), 
+	website_id VARCHAR(100), 
+	PRIMARY KEY (id)
+);
+INSERT INTO "umami_settings" VALUES(1,'','6ea99ce5-33ba-4d44-809a-76f429b7e221');
+CREATE TABLE work_card (
+	id INTEGER NOT NULL, 
+	title VARCHAR(200) NOT NULL, 
+	icon VARCHAR(500) NOT NULL, 
+	text TEXT NOT NULL, 
+	link VARCHAR(500) NOT NULL, 
+	"order" INTEGER NOT NULL, 
+	PRIMARY KEY (id)
+);
+INSERT INTO "work_card" VALUES(1,'Курьер','/assets/img/icons/courier-ico.svg','Lorem Ipsum is simply dummy text of the printing and typesetting industry. Lorem Ipsum has been the industry''s standard dummy text ever since the 1500s, when an unknown printer took.','.',0);
+INSERT INTO "work_card" VALUES(2,'Xимик','/assets/img/icons/chemie-ico.svg','Lorem Ipsum is simply dummy text of the printing and typesetting industry. Lorem Ipsum has been the industry''s standard dummy text ever since the 1500s, when an unknown printer took.','.',1);
+INSERT INTO "work_card" VALUES(3,'Склад','/assets/img/icons/sklad-ico.svg','Lorem Ipsum is simply dummy text of the printing and typesetting industry. Lorem Ipsum has been the industry''s standard dummy text ever since the 1500s, when an unknown printer took.','.',2);
+COMMIT;
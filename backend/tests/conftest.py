@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from models import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Минимальное приложение с пустой SQLite-базой во временной папке."""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        CONTENT_VERSION_FILE=str(tmp_path / "content.version"),
+        MIGRATION_LOCK_FILE=str(tmp_path / "migrate.lock"),
+        UPLOADS_DIR=str(tmp_path / "uploads"),
+    )
+    os.makedirs(app.config["UPLOADS_DIR"])
+    db.init_app(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,55 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import init_database, write_mode
+from models import db, SiteSetting
+
+
+@pytest.fixture
+def wal_app(app):
+    app.config.update(
+        SQLITE_BUSY_TIMEOUT_MS=5000,
+        SQLITE_MMAP_MB=0,
+        SQLITE_CACHE_MB=2,
+        SQLITE_CHECKPOINT_SECONDS=0,
+    )
+    init_database(app)
+    db.create_all()
+    db.session.add(SiteSetting(key="chatbot_preset", value='""'))
+    db.session.commit()
+    return app
+
+
+def _write_from_other_worker(path, timeout=5):
+    connection = sqlite3.connect(path, timeout=timeout)
+    try:
+        connection.execute("UPDATE site_setting SET value = '\"other\"' WHERE key = 'chatbot_preset'")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def test_write_mode_holds_the_write_lock_from_the_first_read(wal_app):
+    path = db.engine.url.database
+    with write_mode():
+        setting = db.session.get(SiteSetting, "chatbot_preset")
+        other = threading.Thread(target=_write_from_other_worker, args=(path,))
+        other.start()
+        other.join(0.3)
+        # Другой воркер ждёт блокировку: прочитанное не изменится до коммита
+        assert other.is_alive()
+        setting.value = '"admin"'
+        db.session.commit()
+    other.join()
+
+    db.session.expire_all()
+    assert db.session.get(SiteSetting, "chatbot_preset").value == '"other"'
+    assert not db.session.info
+
+
+def test_write_mode_releases_the_lock_on_exit(wal_app):
+    with write_mode():
+        db.session.get(SiteSetting, "chatbot_preset")
+    _write_from_other_worker(db.engine.url.database, timeout=0.1)
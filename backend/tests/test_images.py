@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from images import DERIVATIVE_WIDTHS, _target_widths, generate_derivatives, image_sources
+from models import db, UploadedFile
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_target_widths_small_source_keeps_native_width():
+    assert _target_widths(700) == [320, 640, 700]
+
+
+def test_target_widths_wide_source_has_no_duplicates():
+    assert _target_widths(2500) == list(DERIVATIVE_WIDTHS)
+    assert _target_widths(DERIVATIVE_WIDTHS[-1]) == list(DERIVATIVE_WIDTHS)
+
+
+def test_wide_upload_gets_one_variant_per_width(app, tmp_path):
+    db.create_all()
+    record = UploadedFile(sha256="ab" * 32, ext="png", size=0)
+    db.session.add(record)
+    db.session.commit()
+
+    source = tmp_path / "source.png"
+    Image.new("RGB", (2500, 1000), "white").save(source)
+
+    assert generate_derivatives(record, str(source))
+
+    variants = json.loads(record.variants)
+    keys = [(variant["format"], variant["width"]) for variant in variants]
+    assert len(keys) == len(set(keys))
+    assert sorted({width for _, width in keys}) == list(DERIVATIVE_WIDTHS)
+    for source_set in image_sources(record)["sources"]:
+        assert source_set["srcset"].count(" 1920w") == 1
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from jobs import MAX_ATTEMPTS, STALE_AFTER, _claim_next
+from models import db, Job
+
+
+def _writes():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE")):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_idle_poll_does_not_write(app):
+    db.create_all()
+    db.session.add(Job(kind="image_derivatives", payload="{}", status="done", attempts=1))
+    db.session.commit()
+
+    writes = _writes()
+    assert _claim_next() is None
+    assert writes == []
+
+
+def test_abandoned_last_attempt_is_failed(app):
+    db.create_all()
+    started_at = datetime.utcnow() - STALE_AFTER * 2
+    job = Job(kind="image_derivatives", payload="{}", status="running", attempts=MAX_ATTEMPTS, started_at=started_at)
+    db.session.add(job)
+    db.session.commit()
+
+    assert _claim_next() is None
+    db.session.refresh(job)
+    assert job.status == "failed"
+    assert job.finished_at is not None
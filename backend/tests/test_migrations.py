@@ -0,0 +1,68 @@
+import json
+import os
+import sqlite3
+
+from sqlalchemy import inspect
+
+from migrations import MIGRATIONS, current_schema_version, run_migrations
+from models import db, City, Product, SchemaVersion
+from site_settings import site_settings
+
+# Дамп базы предыдущей версии (до миграций): старые таблицы-одиночки,
+# товары в JSON-колонках, города в calculator_settings.cities
+BASELINE_SQL = os.path.join(os.path.dirname(__file__), "baseline.sql")
+
+
+def _load_baseline(app):
+    path = app.config["SQLALCHEMY_DATABASE_URI"][len("sqlite:///"):]
+    connection = sqlite3.connect(path)
+    with open(BASELINE_SQL, encoding="utf-8") as f:
+        connection.executescript(f.read())
+    connection.execute("UPDATE intro_button_link SET link = '#custom'")
+    connection.execute(
+        "UPDATE page_content SET products = ? WHERE page_type = 'wholesale'",
+        (json.dumps([{"name": "Груши", "price": "1 500"}]),),
+    )
+    connection.execute(
+        "UPDATE calculator_settings SET cities = ?",
+        (json.dumps([{"name": "Казань", "products": [{"name": "Яблоки", "price": 1000}]}]),),
+    )
+    connection.commit()
+    connection.close()
+
+
+def _versions():
+    return [(row.version, row.name) for row in SchemaVersion.query.order_by(SchemaVersion.version)]
+
+
+def test_migrates_baseline_database(app):
+    _load_baseline(app)
+
+    run_migrations()
+
+    expected = [(version, migration.__name__.lstrip("_")) for version, migration in MIGRATIONS]
+    assert _versions() == expected
+    assert current_schema_version() == MIGRATIONS[-1][0]
+
+    tables = set(inspect(db.engine).get_table_names())
+    assert {"product", "product_price", "city", "uploaded_file", "job", "site_setting"} <= tables
+    assert site_settings()["intro_button_link"] == "#custom"
+    wholesale = Product.query.filter_by(page="wholesale").all()
+    assert [(product.name, [price.price for price in product.prices]) for product in wholesale] == [("Груши", ["1 500"])]
+    assert [city.name for city in City.query.all()] == ["Казань"]
+
+
+def test_migrations_run_once(app):
+    _load_baseline(app)
+    run_migrations()
+    applied = _versions()
+
+    run_migrations()
+
+    assert _versions() == applied
+
+
+def test_fresh_database_gets_every_migration(app):
+    run_migrations()
+    assert [version for version, _ in _versions()] == [version for version, _ in MIGRATIONS]
+    assert Product.query.count() > 0
@@ -0,0 +1,21 @@
+from models import CalculatorSettings
+from pricing import DEFAULT_SETTINGS, _settings
+
+
+def test_settings_defaults_without_row():
+    assert _settings(None) == DEFAULT_SETTINGS
+
+
+def test_settings_keep_zero_prices():
+    row = CalculatorSettings(
+        weeks_per_month=4.0,
+        packing_bonus=0.0,
+        chemist_kg_price=0.0,
+        carrier_with_weight_price_per_step=None,
+        carrier_without_weight_price_per_step=0.0,
+    )
+    settings = _settings(row)
+    assert settings["packing_bonus"] == 0
+    assert settings["chemist_kg_price"] == 0
+    assert settings["carrier_without_weight_price_per_step"] == 0
+    assert settings["carrier_with_weight_price_per_step"] == DEFAULT_SETTINGS["carrier_with_weight_price_per_step"]
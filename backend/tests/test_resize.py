@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import resize
+from resize import resized_sources, send_resized
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def legacy_image(app):
+    app.config.update(FILE_OFFLOAD="", RESIZE_CACHE_MAX_BYTES=10 * 1024 * 1024)
+    uploads_dir = app.config["UPLOADS_DIR"]
+    os.makedirs(os.path.join(uploads_dir, "products"))
+    Image.new("RGB", (700, 350), "red").save(os.path.join(uploads_dir, "products", "a.jpg"))
+    return uploads_dir
+
+
+def _cache_files(uploads_dir):
+    root = os.path.join(uploads_dir, resize.CACHE_SUBDIR)
+    return [os.path.join(dirpath, name) for dirpath, _, names in os.walk(root) for name in names]
+
+
+def test_sources_stop_at_the_original_width(legacy_image):
+    image = resized_sources("/uploads/products/a.jpg")
+    assert (image["width"], image["height"]) == (700, 350)
+    webp = next(source for source in image["sources"] if source["type"] == "image/webp")
+    assert webp["srcset"] == (
+        "/uploads/products/a.jpg?w=320&fmt=webp 320w, "
+        "/uploads/products/a.jpg?w=640&fmt=webp 640w, "
+        "/uploads/products/a.jpg?w=960&fmt=webp 700w"
+    )
+
+
+def test_missing_legacy_file_has_no_sources(legacy_image):
+    assert resized_sources("/uploads/products/missing.jpg") is None
+
+
+def test_widths_above_the_original_share_one_cache_file(app, legacy_image):
+    for width in (960, 1280, 1920):
+        with app.test_request_context(f"/uploads/products/a.jpg?w={width}&fmt=webp"):
+            response = send_resized(legacy_image, "products/a.jpg", "/_accel/uploads/")
+            response.close()
+    files = _cache_files(legacy_image)
+    assert len(files) == 1
+    with Image.open(files[0]) as image:
+        assert image.width == 700
+
+
+def test_cache_limit_counts_files_of_other_workers(app, legacy_image):
+    # Файл, записанный другим процессом: счётчик этого процесса о нём не знает
+    other = os.path.join(legacy_image, resize.CACHE_SUBDIR, "00", "other.webp")
+    os.makedirs(os.path.dirname(other))
+    with open(other, "wb") as f:
+        f.write(b"x" * 4096)
+    app.config["RESIZE_CACHE_MAX_BYTES"] = 4096
+
+    with app.test_request_context("/uploads/products/a.jpg?w=320&fmt=webp"):
+        send_resized(legacy_image, "products/a.jpg", "/_accel/uploads/").close()
+
+    assert not os.path.exists(other)
+    assert len(_cache_files(legacy_image)) == 1
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from models import db
+from uploads import ICON_EXTENSIONS, IMAGE_EXTENSIONS, UploadError, store_upload
+
+DATA = b"\x00\x00\x01\x00 same bytes"
+
+
+def _file(name):
+    return FileStorage(stream=io.BytesIO(DATA), filename=name)
+
+
+def test_duplicate_upload_returns_existing_record(app):
+    db.create_all()
+    record, created = store_upload(_file("a.png"), IMAGE_EXTENSIONS)
+    again, created_again = store_upload(_file("b.png"), IMAGE_EXTENSIONS)
+    assert created and not created_again
+    assert again.id == record.id
+
+
+def test_duplicate_with_foreign_extension_is_rejected(app):
+    db.create_all()
+    record, _ = store_upload(_file("icon.ico"), ICON_EXTENSIONS)
+    assert record.ext == "ico"
+    with pytest.raises(UploadError):
+        store_upload(_file("product.png"), IMAGE_EXTENSIONS)
@@ -0,0 +1,149 @@
+import hashlib
+import mimetypes
+import os
+import uuid
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from models import db, UploadedFile
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "svg", "webp"}
+ICON_EXTENSIONS = IMAGE_EXTENSIONS | {"ico"}
+VIDEO_EXTENSIONS = {"mp4", "webm", "ogg", "mov"}
+
+
+class UploadError(Exception):
+    """Ошибка проверки загружаемого файла — сообщение показывается админу."""
+
+
+def upload_path(relative_path):
+    return os.path.join(current_app.config["UPLOADS_DIR"], *relative_path.split("/"))
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SPOOL_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _spool(stream, tmp_path, max_size):
+    """Пишет поток во временный файл, одновременно считая SHA-256 и размер."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, "wb") as f:
+        for chunk in iter(lambda: stream.read(SPOOL_CHUNK_SIZE), b""):
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise UploadError(f"Размер файла не должен превышать {max_size // (1024 * 1024)} МБ")
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest(), size
+
+
+def _find_existing(sha256):
+    record = UploadedFile.query.filter_by(sha256=sha256).first()
+    if record is not None and os.path.isfile(upload_path(record.relative_path)):
+        return record
+    return None
+
+
+def _check_extension(record, allowed_extensions):
+    """
+    Файл с тем же содержимым мог быть загружен раньше с другим расширением
+    (например, как иконка .ico): такая запись подходит не каждому эндпоинту.
+    """
+    if allowed_extensions is not None and record.ext not in allowed_extensions:
+        raise UploadError(
+            f"Этот файл уже загружен как .{record.ext}, а здесь разрешены: {', '.join(sorted(allowed_extensions))}"
+        )
+    return record
+
+
+def _store_spooled(tmp_path, sha256, size, ext, original_name, allowed_extensions=None):
+    """
+    Переносит уже посчитанный временный файл в blobs/ или возвращает
+    существующую запись с тем же хэшем. Возвращает (UploadedFile, created).
+    allowed_extensions — расширения, допустимые для вызывающего эндпоинта:
+    существующая запись с другим расширением даёт UploadError.
+    """
+    existing = _find_existing(sha256)
+    if existing is not None:
+        return _check_extension(existing, allowed_extensions), False
+
+    record = UploadedFile.query.filter_by(sha256=sha256).first()
+    if record is not None:
+        _check_extension(record, allowed_extensions)
+    else:
+        record = UploadedFile(
+            sha256=sha256,
+            ext=ext,
+            size=size,
+            mimetype=mimetypes.guess_type(f"file.{ext}")[0],
+            original_name=secure_filename(original_name or "")[:300],
+        )
+    final_path = upload_path(record.relative_path)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+
+    if record.id is None:
+        db.session.add(record)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Тот же файл параллельно сохранил другой запрос
+            db.session.rollback()
+            return _check_extension(UploadedFile.query.filter_by(sha256=sha256).one(), allowed_extensions), False
+    return record, True
+
+
+def temp_upload_path(ext):
+    """Путь для временного файла в blobs/tmp (наружу не отдаётся)."""
+    tmp_dir = upload_path("blobs/tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, f"{uuid.uuid4().hex}.{ext}")
+
+
+def store_upload(file, allowed_extensions, max_size=None):
+    """
+    Общий путь для всех загрузок из админки. Файл хранится один раз по
+    хэшу содержимого: uploads/blobs/ab/cd/<sha256>.<ext>. Повторная
+    загрузка того же файла ничего не пишет на диск и возвращает уже
+    известную запись UploadedFile, если её расширение допустимо здесь. Тяжёлая обработка (копии, faststart)
+    выполняется потом в фоне, см. jobs.py.
+
+    Возвращает (UploadedFile, created).
+    """
+    if file is None:
+        raise UploadError("Файл не найден")
+    if file.filename == "":
+        raise UploadError("Файл не выбран")
+
+    ext = file.filename.rsplit(".", 1)[1].lower() if "." in file.filename else ""
+    if ext not in allowed_extensions:
+        raise UploadError(f"Недопустимое расширение файла. Разрешены: {', '.join(sorted(allowed_extensions))}")
+
+    tmp_path = temp_upload_path(ext)
+    try:
+        sha256, size = _spool(file.stream, tmp_path, max_size)
+        return _store_spooled(tmp_path, sha256, size, ext, file.filename, allowed_extensions)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_local_file(tmp_path, ext, original_name):
+    """
+    Сохраняет готовый файл из blobs/tmp (результат фоновой обработки)
+    так же, как загрузку. Временный файл перемещается или удаляется.
+    """
+    try:
+        return _store_spooled(tmp_path, _file_sha256(tmp_path), os.path.getsize(tmp_path), ext, original_name)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
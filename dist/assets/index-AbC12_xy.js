@@ -0,0 +1 @@
+console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);console.log(1);
\ No newline at end of file
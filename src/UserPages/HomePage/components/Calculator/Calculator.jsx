@@ -1,26 +1,33 @@
 import { useState, useMemo, useEffect, useRef } from 'react';
 import { gsap } from 'gsap';
 import { ScrollTrigger } from 'gsap/ScrollTrigger';
+import { loadHomeContent } from '../../../../hooks/loadHomeContent';
 import './css/Calculator.less';
 
 gsap.registerPlugin(ScrollTrigger);
 
+// Пауза перед запросом расчёта, чтобы не слать его на каждый шаг ползунка
+const QUOTE_DEBOUNCE_MS = 150;
+
+// Доход считает сервер (backend/pricing.py); цены на клиент не приходят
+const fetchQuote = async (params, signal) => {
+	const query = new URLSearchParams(params).toString();
+	const response = await fetch(`/api/calculator/quote?${query}`, { signal });
+	const data = await response.json();
+	if (!response.ok || !data.success) {
+		throw new Error(data.message || `HTTP ${response.status}`);
+	}
+	return data.quote;
+};
+
 const Calculator = () => {
 	const [cities, setCities] = useState([
 		{
 			name: 'Москва',
-			products: [
-				{ name: 'Яблоки', price: 900 },
-				{ name: 'Груши', price: 900 },
-				{ name: 'Апельсины', price: 900 },
-			],
+			products: [{ name: 'Яблоки' }, { name: 'Груши' }, { name: 'Апельсины' }],
 		},
 	]);
-	const [weeksPerMonth, setWeeksPerMonth] = useState(4.33);
-	const [packingBonus, setPackingBonus] = useState(1100);
-	const [chemistKgPrice, setChemistKgPrice] = useState(120000);
-	const [carrierWithWeightPricePerStep, setCarrierWithWeightPricePerStep] = useState(100000);
-	const [carrierWithoutWeightPricePerStep, setCarrierWithoutWeightPricePerStep] = useState(2000);
+	const [income, setIncome] = useState({ monthly: 0, weekly: 0 });
 	const [settingsLoaded, setSettingsLoaded] = useState(false);
 	const [position, setPosition] = useState('courier');
 	const [daysValue, setDaysValue] = useState(6);
@@ -36,39 +43,17 @@ const Calculator = () => {
 	useEffect(() => {
 		const fetchCalculatorSettings = async () => {
 			try {
-				const response = await fetch('/api/get_calculator_settings');
-				if (response.ok) {
-					const data = await response.json();
+				const { calculator_settings: data } = await loadHomeContent();
+				if (data) {
 					if (data.cities && data.cities.length > 0) {
-						setCities(data.cities);
+						// Здесь только названия городов, товары грузятся для выбранного
+						setCities((prev) =>
+							data.cities.map((city) => prev.find((c) => c.name === city.name && c.loaded) || city),
+						);
 						const currentRegionExists = data.cities.some((c) => c.name === region);
 						if (!currentRegionExists) {
 							setRegion(data.cities[0].name);
 						}
-						const selectedCity = data.cities.find(
-							(c) => c.name === (currentRegionExists ? region : data.cities[0].name),
-						);
-						if (selectedCity && selectedCity.products && selectedCity.products.length > 0) {
-							const currentProductExists = selectedCity.products.some((p) => p.name === product);
-							if (!currentProductExists) {
-								setProduct(selectedCity.products[0].name);
-							}
-						}
-					}
-					if (data.weeks_per_month) {
-						setWeeksPerMonth(data.weeks_per_month);
-					}
-					if (data.packing_bonus !== undefined) {
-						setPackingBonus(data.packing_bonus);
-					}
-					if (data.chemist_kg_price !== undefined) {
-						setChemistKgPrice(data.chemist_kg_price);
-					}
-					if (data.carrier_with_weight_price_per_step !== undefined) {
-						setCarrierWithWeightPricePerStep(data.carrier_with_weight_price_per_step);
-					}
-					if (data.carrier_without_weight_price_per_step !== undefined) {
-						setCarrierWithoutWeightPricePerStep(data.carrier_without_weight_price_per_step);
 					}
 				}
 			} catch (error) {
@@ -81,15 +66,47 @@ const Calculator = () => {
 		fetchCalculatorSettings();
 	}, [region, product]);
 
+	useEffect(() => {
+		const selectedCity = cities.find((c) => c.name === region);
+		if (!settingsLoaded || !selectedCity || selectedCity.loaded) {
+			return undefined;
+		}
+
+		let cancelled = false;
+		const fetchCityProducts = async () => {
+			try {
+				const response = await fetch(`/api/calculator/cities/${encodeURIComponent(region)}`);
+				if (!response.ok) {
+					return;
+				}
+				const data = await response.json();
+				if (cancelled || !data.success) {
+					return;
+				}
+				const city = { ...data.city, loaded: true };
+				setCities((prev) => prev.map((c) => (c.name === city.name ? city : c)));
+				if (city.products.length > 0) {
+					setProduct((current) =>
+						city.products.some((p) => p.name === current) ? current : city.products[0].name,
+					);
+				}
+			} catch (error) {
+				console.error('Failed to fetch city products:', error);
+			}
+		};
+
+		fetchCityProducts();
+		return () => {
+			cancelled = true;
+		};
+	}, [cities, region, settingsLoaded]);
+
 	useEffect(() => {
 		const fetchContactUsButtonLink = async () => {
 			try {
-				const response = await fetch('/api/get_contact_us_button_link');
-				if (response.ok) {
-					const data = await response.json();
-					if (data.link) {
-						setContactUsButtonLink(data.link);
-					}
+				const data = await loadHomeContent();
+				if (data.contact_us_button_link) {
+					setContactUsButtonLink(data.contact_us_button_link);
 				}
 			} catch (error) {
 				console.error('Failed to fetch contact us button link:', error);
@@ -101,142 +118,84 @@ const Calculator = () => {
 	const [activePreset, setActivePreset] = useState(null);
 	const [activeHint, setActiveHint] = useState('product');
 
-	const income = useMemo(() => {
-		if (!settingsLoaded) {
-			return { monthly: 0, weekly: 0 };
-		}
-
+	const quoteParams = useMemo(() => {
 		if (position === 'chemist') {
-			const monthlyIncome = Math.round(chemistKg * chemistKgPrice);
-			return {
-				monthly: monthlyIncome,
-				weekly: Math.round(monthlyIncome / weeksPerMonth),
-			};
+			return { position, chemist_kg: chemistKg };
 		}
-
 		if (position === 'transporter') {
-			const withWeightSteps = (carrierWithWeightPerDay - 100) / 10 + 1;
-			const withWeightIncome = withWeightSteps * carrierWithWeightPricePerStep;
-			const withoutWeightSteps = carrierWithoutWeightPerDay / 10;
-			const withoutWeightIncome = withoutWeightSteps * carrierWithoutWeightPricePerStep;
-			const monthlyIncome = Math.round(withWeightIncome + withoutWeightIncome);
 			return {
-				monthly: monthlyIncome,
-				weekly: Math.round(monthlyIncome / weeksPerMonth),
+				position,
+				carrier_with_weight_per_day: carrierWithWeightPerDay,
+				carrier_without_weight_per_day: carrierWithoutWeightPerDay,
 			};
 		}
-
-		const selectedCity = cities.find((c) => c.name === region);
-		let productPrice = 900; // Значение по умолчанию
-
-		if (selectedCity && selectedCity.products) {
-			const cityProduct = selectedCity.products.find((p) => p.name === product);
-			if (cityProduct) {
-				productPrice = cityProduct.price;
-			} else if (selectedCity.products.length > 0) {
-				productPrice = selectedCity.products[0].price;
-			}
-		}
-
-		if (packingBySelf) {
-			productPrice += packingBonus;
-		}
-
-		const dailyIncome = productPrice * depositsValue;
-		const monthlyIncome = dailyIncome * daysValue;
-		const weeklyIncome = Math.round(monthlyIncome / weeksPerMonth);
 		return {
-			monthly: monthlyIncome,
-			weekly: weeklyIncome,
+			position,
+			city: region,
+			product,
+			days: daysValue,
+			deposits: depositsValue,
+			packing_by_self: packingBySelf ? 1 : 0,
 		};
 	}, [
-		daysValue,
-		depositsValue,
-		product,
 		position,
-		cities,
-		region,
-		weeksPerMonth,
-		settingsLoaded,
-		packingBySelf,
-		packingBonus,
 		chemistKg,
-		chemistKgPrice,
 		carrierWithWeightPerDay,
 		carrierWithoutWeightPerDay,
-		carrierWithWeightPricePerStep,
-		carrierWithoutWeightPricePerStep,
+		region,
+		product,
+		daysValue,
+		depositsValue,
+		packingBySelf,
 	]);
 
-	const formatNumber = (num) => {
-		return num.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ' ');
-	};
-
-	const setPresetIncome = (targetIncome) => {
-		if (!settingsLoaded) return;
-
-		if (position === 'chemist') {
-			const kg = Math.min(50, Math.max(1, Math.round(targetIncome / chemistKgPrice)));
-			setChemistKg(kg);
-			setActivePreset(targetIncome);
-			return;
-		}
-
-		if (position === 'transporter') {
-			const withWeightSteps = Math.max(0, (carrierWithWeightPerDay - 100) / 10 + 1);
-			const currentWith = withWeightSteps * carrierWithWeightPricePerStep;
-			if (targetIncome <= currentWith) {
-				const steps = Math.max(0, Math.floor(targetIncome / carrierWithWeightPricePerStep));
-				const dayVal = 100 + (steps - 1) * 10;
-				setCarrierWithWeightPerDay(Math.min(2000, Math.max(100, dayVal)));
-				setCarrierWithoutWeightPerDay(0);
-			} else {
-				const rest = targetIncome - currentWith;
-				const steps = Math.floor(rest / carrierWithoutWeightPricePerStep);
-				setCarrierWithoutWeightPerDay(Math.min(2000, Math.max(0, steps * 10)));
-			}
-			setActivePreset(targetIncome);
-			return;
+	useEffect(() => {
+		if (!settingsLoaded) {
+			return undefined;
 		}
 
-		{
-			const selectedCity = cities.find((c) => c.name === region);
-			let productPrice = 900;
-
-			if (selectedCity && selectedCity.products) {
-				const cityProduct = selectedCity.products.find((p) => p.name === product);
-				if (cityProduct) {
-					productPrice = cityProduct.price;
-				} else if (selectedCity.products.length > 0) {
-					productPrice = selectedCity.products[0].price;
+		const controller = new AbortController();
+		const timer = setTimeout(async () => {
+			try {
+				const quote = await fetchQuote(quoteParams, controller.signal);
+				setIncome({ monthly: quote.monthly, weekly: quote.weekly });
+			} catch (error) {
+				if (error.name !== 'AbortError') {
+					console.error('Failed to fetch income quote:', error);
 				}
 			}
+		}, QUOTE_DEBOUNCE_MS);
 
-			if (packingBySelf) {
-				productPrice += packingBonus;
-			}
-
-			const maxIncome = productPrice * 100 * 30;
+		return () => {
+			clearTimeout(timer);
+			controller.abort();
+		};
+	}, [quoteParams, settingsLoaded]);
 
-			if (targetIncome >= maxIncome) {
-				setDaysValue(30);
-				setDepositsValue(100);
-				setActivePreset(targetIncome);
-				return;
-			}
+	const formatNumber = (num) => {
+		return num.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ' ');
+	};
 
-			let calculatedDeposits = Math.ceil(targetIncome / (productPrice * 30));
+	const setPresetIncome = async (targetIncome) => {
+		if (!settingsLoaded) return;
 
-			if (calculatedDeposits > 100) {
-				calculatedDeposits = 100;
-				const calculatedDays = Math.ceil(targetIncome / (productPrice * calculatedDeposits));
-				setDaysValue(Math.min(Math.max(calculatedDays, 1), 30));
+		// Значения ползунков под желаемый доход подбирает сервер
+		try {
+			const quote = await fetchQuote({ ...quoteParams, target_monthly: targetIncome });
+			const { inputs } = quote;
+			if (quote.position === 'chemist') {
+				setChemistKg(inputs.chemist_kg);
+			} else if (quote.position === 'transporter') {
+				setCarrierWithWeightPerDay(inputs.carrier_with_weight_per_day);
+				setCarrierWithoutWeightPerDay(inputs.carrier_without_weight_per_day);
 			} else {
-				setDaysValue(30);
+				setDaysValue(inputs.days);
+				setDepositsValue(inputs.deposits);
 			}
-
-			setDepositsValue(Math.min(Math.max(calculatedDeposits, 1), 100));
+			setIncome({ monthly: quote.monthly, weekly: quote.weekly });
 			setActivePreset(targetIncome);
+		} catch (error) {
+			console.error('Failed to fetch preset quote:', error);
 		}
 	};
 
@@ -2,6 +2,7 @@ import { Navigation } from '../../../../components/Navigation/NavigationFixed';
 import { useState, useEffect, useRef } from 'react';
 import { gsap } from 'gsap';
 import { ScrollTrigger } from 'gsap/ScrollTrigger';
+import { loadHomeContent } from '../../../../hooks/loadHomeContent';
 import './css/Intro.less';
 
 gsap.registerPlugin(ScrollTrigger);
@@ -13,37 +14,23 @@ const Intro = () => {
 	const introWrapperRef = useRef(null);
 
 	useEffect(() => {
-		const fetchIntroLink = async () => {
+		const fetchIntroContent = async () => {
 			try {
-				const response = await fetch('/api/get_intro_button_link');
-				if (response.ok) {
-					const data = await response.json();
-					if (data.link) {
-						setIntroLink(data.link);
-					}
+				const data = await loadHomeContent();
+				if (data.intro_button_link) {
+					setIntroLink(data.intro_button_link);
 				}
-			} catch (error) {
-				console.error('Failed to fetch intro button link:', error);
-			}
-		};
-
-		const fetchIntroBackground = async () => {
-			try {
-				const response = await fetch('/api/get_intro_background');
-				if (response.ok) {
-					const data = await response.json();
-					if (data.background_path) {
-						setBackgroundPath(data.background_path);
-						setBackgroundType(data.background_type || 'image');
-					}
+				const background = data.intro_background;
+				if (background && background.background_path) {
+					setBackgroundPath(background.background_path);
+					setBackgroundType(background.background_type || 'image');
 				}
 			} catch (error) {
-				console.error('Failed to fetch intro background:', error);
+				console.error('Failed to fetch intro content:', error);
 			}
 		};
 
-		fetchIntroLink();
-		fetchIntroBackground();
+		fetchIntroContent();
 	}, []);
 
 	useEffect(() => {
@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { gsap } from 'gsap';
 import { ScrollTrigger } from 'gsap/ScrollTrigger';
+import { loadHomeContent } from '../../../../hooks/loadHomeContent';
 import './css/Links.less';
 
 gsap.registerPlugin(ScrollTrigger);
@@ -14,8 +15,7 @@ const Links = () => {
 	useEffect(() => {
 		const fetchLinks = async () => {
 			try {
-				const response = await fetch('/api/get_links');
-				const data = await response.json();
+				const data = await loadHomeContent();
 				if (data.links) {
 					setLinks(data.links);
 				}
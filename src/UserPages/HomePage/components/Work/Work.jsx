@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { gsap } from 'gsap';
 import { ScrollTrigger } from 'gsap/ScrollTrigger';
+import { loadHomeContent } from '../../../../hooks/loadHomeContent';
 import './css/Work.less';
 
 gsap.registerPlugin(ScrollTrigger);
@@ -40,13 +41,9 @@ const Work = () => {
 	useEffect(() => {
 		const fetchWorkCards = async () => {
 			try {
-				const response = await fetch('/api/get_work_cards');
-				if (!response.ok) {
-					throw new Error(`HTTP error! status: ${response.status}`);
-				}
-				const data = await response.json();
-				if (data.cards) {
-					setCards(data.cards);
+				const data = await loadHomeContent();
+				if (data.work_cards) {
+					setCards(data.work_cards);
 				} else {
 					setCards([]);
 				}
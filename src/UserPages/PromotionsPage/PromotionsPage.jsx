@@ -1,4 +1,6 @@
 import React, { useState, useEffect } from 'react';
+import { fetchContent } from '../../hooks/fetchContent';
+import ResponsiveImage from '../../components/ResponsiveImage/ResponsiveImage';
 import './css/PromotionsPage.less';
 
 const PromotionsPage = () => {
@@ -12,12 +14,12 @@ const PromotionsPage = () => {
 	useEffect(() => {
 		const fetchPageData = async () => {
 			try {
-				const response = await fetch('/api/promotions');
-				const data = await response.json();
+				const data = await fetchContent('promotions.json', '/api/promotions');
 				if (data.success) {
 					setPageData({
 						text: data.text || '',
 						image_path: data.image_path || '',
+						image: data.image || null,
 						products: data.products || []
 					});
 				}
@@ -50,8 +52,11 @@ const PromotionsPage = () => {
 				{hasHeroImage && (
 					<section className="promotions-page__image">
 						<div className="promotions-page__image-wrapper">
-							<img
+							<ResponsiveImage
 								src={pageData.image_path}
+								image={pageData.image}
+								sizes="100vw"
+								loading="eager"
 								alt="Предзаказы из Европы"
 								onError={(e) => {
 									e.currentTarget.style.display = 'none';
@@ -76,8 +81,9 @@ const PromotionsPage = () => {
 									<article key={product.id || index} className="promotions-page__product">
 										<div className="promotions-page__product-media">
 											<div className="promotions-page__product-image-wrapper">
-												<img
+												<ResponsiveImage
 													src={imageSrc}
+													image={product.image}
 													alt={product.name || 'Акционный товар'}
 													className="promotions-page__product-image"
 													onError={(e) => {
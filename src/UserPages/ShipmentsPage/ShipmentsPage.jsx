@@ -1,4 +1,6 @@
 import React, { useState, useEffect } from 'react';
+import { fetchContent } from '../../hooks/fetchContent';
+import ResponsiveImage from '../../components/ResponsiveImage/ResponsiveImage';
 import './css/ShipmentsPage.less';
 
 const ShipmentsPage = () => {
@@ -12,8 +14,7 @@ const ShipmentsPage = () => {
 	useEffect(() => {
 		const fetchPageData = async () => {
 			try {
-				const response = await fetch('/api/pages/shipments');
-				const data = await response.json();
+				const data = await fetchContent('pages/shipments.json', '/api/pages/shipments');
 				if (data.success) {
 					setPageData({
 						top_text: data.top_text || '',
@@ -58,8 +59,9 @@ const ShipmentsPage = () => {
 								<article key={product.id || index} className="shipments-page__product">
 									<div className="shipments-page__product-media">
 										<div className="shipments-page__product-image-wrapper">
-											<img
+											<ResponsiveImage
 												src={imageSrc}
+												image={product.image}
 												alt={product.name || 'Товар'}
 												className="shipments-page__product-image"
 												onError={(e) => {
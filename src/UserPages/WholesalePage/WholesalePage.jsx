@@ -1,4 +1,6 @@
 import React, { useState, useEffect } from 'react';
+import { fetchContent } from '../../hooks/fetchContent';
+import ResponsiveImage from '../../components/ResponsiveImage/ResponsiveImage';
 import './css/WholesalePage.less';
 
 const WholesalePage = () => {
@@ -12,8 +14,7 @@ const WholesalePage = () => {
 	useEffect(() => {
 		const fetchPageData = async () => {
 			try {
-				const response = await fetch('/api/pages/wholesale');
-				const data = await response.json();
+				const data = await fetchContent('pages/wholesale.json', '/api/pages/wholesale');
 				if (data.success) {
 					setPageData({
 						top_text: data.top_text || '',
@@ -61,8 +62,9 @@ const WholesalePage = () => {
 								<article key={product.id || index} className="wholesale-page__product">
 									<div className="wholesale-page__product-media">
 										<div className="wholesale-page__product-image-wrapper">
-											<img
+											<ResponsiveImage
 												src={imageSrc}
+												image={product.image}
 												alt={product.name || 'Оптовый товар'}
 												className="wholesale-page__product-image"
 												onError={(e) => {
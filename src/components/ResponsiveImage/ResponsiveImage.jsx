@@ -0,0 +1,34 @@
+import React from "react";
+
+// <picture> с AVIF/WebP копиями загруженной картинки (поле image из API).
+// Без данных о копиях рендерит обычный <img>.
+const ResponsiveImage = ({ src, image, sizes = "(max-width: 768px) 100vw, 50vw", ...props }) => {
+  const sources = image && Array.isArray(image.sources) ? image.sources : [];
+
+  const img = (
+    <img
+      src={src}
+      width={image?.width || undefined}
+      height={image?.height || undefined}
+      loading="lazy"
+      decoding="async"
+      {...props}
+    />
+  );
+
+  if (sources.length === 0) {
+    return img;
+  }
+
+  return (
+    // display: contents — <picture> не влияет на вёрстку, стили остаются на <img>
+    <picture style={{ display: "contents" }}>
+      {sources.map((source) => (
+        <source key={source.type} type={source.type} srcSet={source.srcset} sizes={sizes} />
+      ))}
+      {img}
+    </picture>
+  );
+};
+
+export default ResponsiveImage;
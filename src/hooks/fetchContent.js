@@ -0,0 +1,17 @@
+// Сначала статический снимок из /content, при его отсутствии — API
+export const fetchContent = async (snapshotPath, apiPath) => {
+	try {
+		const response = await fetch(`/content/${snapshotPath}`);
+		if (response.ok) {
+			return await response.json();
+		}
+	} catch (error) {
+		console.error(`Failed to fetch snapshot ${snapshotPath}:`, error);
+	}
+
+	const response = await fetch(apiPath);
+	if (!response.ok) {
+		throw new Error(`HTTP error! status: ${response.status}`);
+	}
+	return response.json();
+};
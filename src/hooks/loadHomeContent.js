@@ -0,0 +1,34 @@
+import { fetchContent } from './fetchContent';
+
+let homeContentPromise = null;
+
+// Данные, встроенные сервером в index.html (INLINE_INITIAL_DATA)
+const readInitialData = () => {
+	const element = document.getElementById('initial-data');
+	if (!element) {
+		return null;
+	}
+	try {
+		return JSON.parse(element.textContent);
+	} catch (error) {
+		console.error('Failed to parse initial data:', error);
+		return null;
+	}
+};
+
+// Один запрос на все секции главной страницы
+export const loadHomeContent = () => {
+	if (!homeContentPromise) {
+		const initialData = readInitialData();
+		if (initialData) {
+			homeContentPromise = Promise.resolve(initialData);
+			return homeContentPromise;
+		}
+		homeContentPromise = fetchContent('home.json', '/api/bootstrap')
+			.catch((error) => {
+				homeContentPromise = null;
+				throw error;
+			});
+	}
+	return homeContentPromise;
+};